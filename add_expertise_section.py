@@ -1,4 +1,4 @@
-from app import app, db, Page, Section
+from app import app, db, Page, Section, assign_translation_groups, bump_content_version, page_scope
 
 def add_expertise_section():
     with app.app_context():
@@ -53,7 +53,10 @@ def add_expertise_section():
         for section_data in sections_data:
             section = Section(**section_data)
             db.session.add(section)
+        db.session.flush()
+        assign_translation_groups(home_page.id)
         
+        bump_content_version(page_scope(home_page.slug))
         db.session.commit()
         print(f"✓ Successfully added {len(sections_data)} expertise sections!")
         print("  - The section is now visible between hero and services")
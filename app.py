@@ -4,21 +4,45 @@
 #  * Fait par : Aisance KALONJI, www.aisancekalonji.com
 #  * Auditer par : La CyberConfiance, www.cyberconfiance.com
 
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import mimetypes
 import os
-import secrets
+import tempfile
+import threading
 import time
-from datetime import datetime
+import uuid
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from itertools import zip_longest
+from types import MappingProxyType
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
 load_dotenv()
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session, abort
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session, abort, make_response, g, stream_with_context
+from flask.sessions import SecureCookieSessionInterface
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, safe_join
+from markupsafe import Markup, escape
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from werkzeug.middleware.proxy_fix import ProxyFix
-from PIL import Image as PILImage
+from PIL import Image as PILImage, ImageOps
+from metrics import metrics
+from query_budgets import amortized, query_budget, query_budgets
 from flask_wtf.csrf import CSRFProtect
 from flask_talisman import Talisman
 
@@ -32,10 +56,64 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     "pool_pre_ping": True,
 }
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
+# Resized WebP/AVIF copies of uploads and bundled images, served through srcset
+app.config['DERIVATIVES_FOLDER'] = 'static/derived'
+app.config['DERIVATIVE_WIDTHS'] = [int(w) for w in os.getenv('DERIVATIVE_WIDTHS', '480,960,1600').split(',')]
+app.config['IMAGE_WORKERS'] = int(os.getenv('IMAGE_WORKERS', '2'))
+# Extra derivative width for uploads, shown in the admin image library
+app.config['THUMBNAIL_WIDTH'] = int(os.getenv('THUMBNAIL_WIDTH', '320'))
+app.config['IMAGE_PAGE_SIZE'] = 40
+app.config['IMAGE_PAGE_SIZE_MAX'] = 100
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+# Uploads are stored under their SHA-256 and dist/ files under a content hash,
+# so those URLs never change content
+app.config['IMMUTABLE_CACHE_MAX_AGE'] = 365 * 24 * 3600
+app.config['ASSET_MANIFEST'] = 'static/dist/manifest.json'
+# favicon.ico frames and PWA icon sizes, rendered from the configured images
+app.config['FAVICON_SIZES'] = [16, 32, 48]
+app.config['PWA_ICON_SIZES'] = [192, 512]
+app.config['APPLE_TOUCH_ICON_SIZE'] = 180
+# For the unversioned /favicon.ico and /apple-touch-icon.png URLs
+app.config['ICON_CACHE_MAX_AGE'] = 24 * 3600
+# Above this many URLs /sitemap.xml becomes an index of /sitemap-<n>.xml files
+app.config['SITEMAP_MAX_URLS'] = int(os.getenv('SITEMAP_MAX_URLS', '5000'))
+# Responses smaller than this go out uncompressed; levels trade CPU for bytes
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '500'))
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', '6'))
+app.config['BROTLI_QUALITY'] = int(os.getenv('BROTLI_QUALITY', '5'))
+# Written by build_tailwind.py; without it the pages fall back to the Tailwind CDN script
+app.config['TAILWIND_CSS'] = 'css/tailwind.css'
+app.config['TAILWIND_BUILT'] = os.path.exists(os.path.join(app.static_folder, app.config['TAILWIND_CSS']))
+# Above-the-fold CSS per page template, written by build_critical_css.py
+app.config['CRITICAL_CSS'] = 'build/critical.json'
+app.config['UPLOAD_CHUNK_SIZE'] = 64 * 1024
 app.config['ADMIN_INIT_ALLOWED'] = os.getenv('ADMIN_INIT_ALLOWED', 'false').lower() == 'true'
 app.config['LANGUAGES'] = ['fr', 'en']
 app.config['DEFAULT_LANGUAGE'] = 'fr'
+app.config['PAGE_CACHE_ENABLED'] = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+# Seconds a worker trusts its view of content_version before re-reading it
+app.config['CONTENT_VERSION_TTL'] = float(os.getenv('CONTENT_VERSION_TTL', '2'))
+app.config['STATIC_EXPORT_DIR'] = os.getenv('STATIC_EXPORT_DIR', 'build/site')
+app.config['SITE_URL'] = os.getenv('SITE_URL', 'https://localhost')
+# Hosts besides SITE_URL's that get absolute URLs, and page cache entries, of their own; any
+# other Host or X-Forwarded-Host is answered as SITE_URL, so it can neither bypass nor grow the cache
+app.config['ALLOWED_HOSTS'] = [host.strip() for host in os.getenv('ALLOWED_HOSTS', 'localhost:5000,127.0.0.1:5000').split(',')
+                               if host.strip()]
+# Rendered pages one worker keeps; the least recently used go first
+app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', '256'))
+# Public pages never read or write the session, so they carry no Set-Cookie and can be shared by proxies
+app.config['COOKIELESS_PUBLIC_PAGES'] = os.getenv('COOKIELESS_PUBLIC_PAGES', 'true').lower() == 'true'
+app.config['PUBLIC_CACHE_CONTROL'] = os.getenv('PUBLIC_CACHE_CONTROL', 'public, no-cache')
+# Request/SQL/template metrics, merged across workers through METRICS_DIR and served at /admin/metrics
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+app.config['METRICS_DIR'] = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'bellari-metrics'))
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Lets a scraper read /admin/metrics with `Authorization: Bearer <token>` instead of a login
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+# 'auto' raises QueryBudgetExceeded under testing or debug and logs a warning otherwise; see query_budgets.py
+app.config['QUERY_BUDGET_MODE'] = os.getenv('QUERY_BUDGET_MODE', 'auto')
+# Runs of one statement within a request reported as a likely N+1
+app.config['QUERY_REPEAT_THRESHOLD'] = int(os.getenv('QUERY_REPEAT_THRESHOLD', '3'))
 
 # Secure Cookie Configuration
 app.config.update(
@@ -47,33 +125,158 @@ app.config.update(
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'ico'}
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(app.config['DERIVATIVES_FOLDER'], exist_ok=True)
 
 # Initialize Extensions
 db = SQLAlchemy(app)
+# Registered first so its after_request hook runs last and sees the final response
+metrics.init_app(app)
+query_budgets.init_app(app)
 login_manager = LoginManager()
-login_manager.init_app(app)
+# The default context processor loads the user (and so the session) on every render
+login_manager.init_app(app, add_context_processor=False)
 login_manager.login_view = 'admin_login'
 
 csrf = CSRFProtect(app)
 
+class StatelessSessionInterface(SecureCookieSessionInterface):
+    """Leaves stateless public responses without a session cookie or Vary: Cookie.
+
+    Flask-Login's remember-cookie hook reads the session on every response, so
+    the session is marked accessed even on pages that never use it.
+    """
+
+    def save_session(self, app, session, response):
+        if is_stateless_request():
+            return
+        super().save_session(app, session, response)
+
+app.session_interface = StatelessSessionInterface()
+
+IMMUTABLE_STATIC_PREFIXES = ('uploads/', 'dist/')
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'application/xml',
+    'application/json', 'application/manifest+json', 'application/javascript', 'text/javascript',
+}
+
+# Preferred first; build_assets.py writes a sibling file per suffix
+PRECOMPRESSED_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+def accepted_encoding():
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(encodings)
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=app.config['BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=app.config['COMPRESS_LEVEL'], mtime=0)
+
+def static_precompressed(filename):
+    """Static view that serves a .br/.gz sibling when the client accepts it."""
+    accepted = request.accept_encodings
+    siblings = [(encoding, filename + suffix) for encoding, suffix in PRECOMPRESSED_SUFFIXES
+                if os.path.isfile(safe_join(app.static_folder, filename + suffix) or '')]
+    for encoding, sibling in siblings:
+        if accepted[encoding]:
+            response = send_from_directory(app.static_folder, sibling,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = app.send_static_file(filename)
+    if siblings:
+        response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = static_precompressed
+
+@app.after_request
+def cache_immutable_static(response):
+    if (request.endpoint == 'static' and response.status_code in (200, 304)
+            and request.view_args.get('filename', '').startswith(IMMUTABLE_STATIC_PREFIXES)):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config['IMMUTABLE_CACHE_MAX_AGE']
+        response.cache_control.immutable = True
+    return response
+
+@app.after_request
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    # Even when too small to compress, so that it matches the 304s
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    encoding = accepted_encoding()
+    if encoding is None:
+        return response
+    cached = g.get('page_cache_entry')
+    if cached is not None:
+        body = page_cache.get_or_encode(*cached, encoding, lambda: compress(data, encoding))
+    else:
+        body = compress(data, encoding)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+script_src = ['\'self\'', '\'unsafe-inline\'']
+if not app.config['TAILWIND_BUILT']:
+    script_src.append('https://cdn.tailwindcss.com')
+
 csp = {
     'default-src': '\'self\'',
     'style-src': ['\'self\'', '\'unsafe-inline\'', 'https://fonts.googleapis.com'],
-    'script-src': ['\'self\'', '\'unsafe-inline\'', 'https://cdn.tailwindcss.com'],
+    'script-src': script_src,
     'font-src': ['\'self\'', 'https://fonts.gstatic.com'],
     'img-src': ['\'self\'', 'data:', 'https:'],
     'connect-src': '\'self\''
 }
 talisman = Talisman(app, content_security_policy=csp, force_https=os.environ.get('FORCE_HTTPS', 'True').lower() == 'true')
 
+# URL rule fragment matching a supported language prefix, e.g. /en/about
+LANG_RULE = f"<any({', '.join(app.config['LANGUAGES'])}):lang>"
+
+def url_language(path):
+    """Language prefix of a path ('/en/about' -> 'en'), or None."""
+    prefix = path.lstrip('/').split('/', 1)[0]
+    return prefix if prefix in app.config['LANGUAGES'] else None
+
+def localized_path(path, lang):
+    """Rewrite '/about' or '/en/about' to '/<lang>/about'."""
+    parts = path.lstrip('/').split('/', 1)
+    if parts[0] in app.config['LANGUAGES']:
+        rest = parts[1] if len(parts) > 1 else ''
+    else:
+        rest = path.lstrip('/')
+    return f'/{lang}/{rest}'
+
 def get_language():
+    lang = (request.view_args or {}).get('lang') or url_language(request.path)
+    if lang:
+        return lang
+    if is_stateless_request():
+        return app.config['DEFAULT_LANGUAGE']
+    # Legacy fallback for unprefixed URLs
     return session.get('language', app.config['DEFAULT_LANGUAGE'])
 
+# Endpoints that must not touch the session when COOKIELESS_PUBLIC_PAGES is on
+STATELESS_ENDPOINTS = {'index', 'about', 'services', 'portfolio', 'contact', 'service_worker',
+                       'sitemap', 'robots', 'manifest', 'favicon', 'site_icon', 'static',
+                       'sitemap_part'}
+
+def is_stateless_request():
+    return (app.config['COOKIELESS_PUBLIC_PAGES']
+            and request.method in ('GET', 'HEAD')
+            and request.endpoint in STATELESS_ENDPOINTS)
+
 @app.context_processor
 def inject_site_settings():
-    settings_dict = {}
-    for setting in SiteSettings.query.all():
-        settings_dict[setting.key] = setting.value
+    settings_dict = settings_snapshot.current()
     
     logo_url = settings_dict.get('site_logo', '/static/logo.png')
     return {
@@ -117,6 +320,13 @@ class Section(db.Model):
     background_color = db.Column(db.String(20))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Shared by the language versions of one section
+    translation_group_id = db.Column(db.String(32), index=True)
+
+    # Serves load_page(): filter on the first three columns, already sorted on the fourth
+    __table_args__ = (
+        db.Index('ix_section_page_lang_active_order', 'page_id', 'language_code', 'is_active', 'order_index'),
+    )
 
 class Image(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -126,7 +336,36 @@ class Image(db.Model):
     file_size = db.Column(db.Integer)
     width = db.Column(db.Integer)
     height = db.Column(db.Integer)
+    # SHA-256 of the file; null only for legacy uploads whose file is missing
+    content_hash = db.Column(db.String(64), unique=True, index=True)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    derivatives = db.relationship('ImageDerivative', backref='image', lazy=True, cascade='all, delete-orphan')
+
+    # Serves the keyset pagination of admin_api_images()
+    __table_args__ = (
+        db.Index('ix_image_uploaded_at_id', 'uploaded_at', 'id'),
+    )
+
+# Text matched by the image library search. Migration 6 builds a trigram index
+# on the same expression on PostgreSQL, so keep the two in sync.
+image_search_text = db.func.lower(Image.original_filename + ' ' + db.func.coalesce(Image.alt_text, ''))
+
+class ImageDerivative(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Null for bundled static/images files, which have no Image row
+    image_id = db.Column(db.Integer, db.ForeignKey('image.id'), nullable=True)
+    # Paths relative to the static folder, e.g. 'uploads/ab12_photo.jpg'
+    source = db.Column(db.String(300), nullable=False, index=True)
+    filename = db.Column(db.String(300), nullable=False)
+    format = db.Column(db.String(10), nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer)
+    file_size = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('source', 'format', 'width', name='uq_image_derivative_source_format_width'),
+    )
 
 class SiteSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -135,6 +374,468 @@ class SiteSettings(db.Model):
     description = db.Column(db.String(300))
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class ContentVersion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(100), unique=True, nullable=False)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+SETTINGS_SCOPE = 'settings'
+IMAGES_SCOPE = 'images'
+
+def page_scope(slug):
+    return f'page:{slug}'
+
+def new_translation_group():
+    return uuid.uuid4().hex
+
+def assign_translation_groups(page_id=None):
+    """
+    Give each section without a translation group one, grouping the n-th section
+    of a type in every language of a page (by order_index). Returns the number of
+    sections updated; the caller commits.
+    """
+    query = Section.query.filter(Section.translation_group_id.is_(None))
+    if page_id is not None:
+        query = query.filter_by(page_id=page_id)
+
+    buckets = {}
+    for section in query.order_by(Section.order_index, Section.id):
+        by_lang = buckets.setdefault((section.page_id, section.section_type), {})
+        by_lang.setdefault(section.language_code, []).append(section)
+
+    updated = 0
+    for by_lang in buckets.values():
+        for row in zip_longest(*by_lang.values()):
+            group_id = new_translation_group()
+            for section in row:
+                if section is not None:
+                    section.translation_group_id = group_id
+                    updated += 1
+    return updated
+
+class ContentVersions:
+    """
+    Worker-local view of the content_version table.
+    The table is re-read at most once every CONTENT_VERSION_TTL seconds, so other
+    gunicorn workers pick up admin writes without a query on every request.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._modified = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        ttl = app.config['CONTENT_VERSION_TTL']
+        if self._checked_at is None or time.monotonic() - self._checked_at >= ttl:
+            with self._lock:
+                if self._checked_at is None or time.monotonic() - self._checked_at >= ttl:
+                    with amortized():
+                        rows = db.session.query(ContentVersion.scope, ContentVersion.version,
+                                                ContentVersion.updated_at).all()
+                    self._versions = {scope: version for scope, version, _ in rows}
+                    self._modified = {scope: updated_at for scope, _, updated_at in rows if updated_at}
+                    self._checked_at = time.monotonic()
+        return self._versions
+
+    def last_modified(self, *scopes):
+        """Newest write time among scopes (all scopes when none are given), or None."""
+        self.current()
+        times = [self._modified[scope] for scope in (scopes or self._modified) if scope in self._modified]
+        return max(times) if times else None
+
+    def expire(self):
+        self._checked_at = None
+
+class PageCache:
+    """
+    Rendered HTML of the public pages, keyed by (slug, language, site_root()).
+    Each entry remembers the (page, settings, images) versions it was rendered from; a
+    version mismatch means the entry is stale. Only one thread rebuilds a given
+    entry at a time, the others keep serving the stale copy meanwhile.
+    Compressed copies of an entry's body are kept next to it, per encoding.
+    At most PAGE_CACHE_MAX_ENTRIES entries are kept, least recently used dropped first.
+    """
+
+    # Builds are serialised per stripe rather than per key, so the locks never grow
+    BUILD_LOCK_STRIPES = 64
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._build_locks = tuple(threading.Lock() for _ in range(self.BUILD_LOCK_STRIPES))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _build_lock(self, key):
+        return self._build_locks[hash(key) % len(self._build_locks)]
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _get(self, key, version):
+        """The entry for key, counted as a hit and marked recently used if it matches version."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > app.config['PAGE_CACHE_MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, key, version, render):
+        entry = self._get(key, version)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        build_lock = self._build_lock(key)
+        if not build_lock.acquire(blocking=entry is None):
+            self._count('stale_hits')
+            return entry[1]
+        try:
+            entry = self._get(key, version)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            self._count('misses')
+            with amortized():
+                body = render()
+            self._put(key, (version, body, {}))
+            return body
+        finally:
+            build_lock.release()
+
+    def get_or_encode(self, key, body, encoding, encode):
+        """Compressed body of an entry, computed once; body guards against a swapped entry."""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] is not body:
+            return encode()
+        encoded = entry[2]
+        if encoding not in encoded:
+            encoded[encoding] = encode()
+        return encoded[encoding]
+
+    def invalidate(self, slug=None):
+        with self._lock:
+            for key in list(self._entries):
+                if slug is None or key[0] == slug:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+            }
+
+class VersionedValue:
+    """
+    Worker-local value built by load() and rebuilt whenever the content version
+    of scope moves. The new value is swapped in with one assignment, so readers
+    never see a half-built one; load() should return something immutable.
+    """
+
+    def __init__(self, scope, load):
+        self._scope = scope
+        self._load = load
+        self._value = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        version = content_versions.current().get(self._scope, 0)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    with amortized():
+                        self._value = self._load()
+                    self._version = version
+        return self._value
+
+    def expire(self):
+        self._version = None
+
+def _load_settings():
+    """Read-only key -> value mapping of SiteSettings."""
+    return MappingProxyType(dict(db.session.query(SiteSettings.key, SiteSettings.value).all()))
+
+ResponsiveImage = namedtuple('ResponsiveImage', ['url', 'sources'])
+
+# Smallest format first: browsers take the first <source> they can decode
+DERIVATIVE_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+def _load_derivative_index():
+    """Read-only source -> ((mime type, srcset), ...) mapping built from image_derivative."""
+    by_source = {}
+    rows = (db.session.query(ImageDerivative.source, ImageDerivative.format,
+                             ImageDerivative.width, ImageDerivative.filename)
+            .order_by(ImageDerivative.width).all())
+    for source, fmt, width, filename in rows:
+        candidates = by_source.setdefault(source, {}).setdefault(fmt, [])
+        candidates.append(f"{url_for('static', filename=filename)} {width}w")
+    return MappingProxyType({
+        source: tuple((DERIVATIVE_MIME_TYPES[fmt], ', '.join(formats[fmt]))
+                      for fmt in DERIVATIVE_MIME_TYPES if fmt in formats)
+        for source, formats in by_source.items()
+    })
+
+Icon = namedtuple('Icon', ['data', 'mimetype', 'etag'])
+
+def app_icon_url(settings_dict):
+    """Image the PWA and apple-touch icons are made from, as chosen in the settings."""
+    if settings_dict.get('pwa_display_mode', 'default') == 'custom':
+        return settings_dict.get('pwa_icon_url') or settings_dict.get('site_logo', '/static/logo.png')
+    return settings_dict.get('site_logo', '/static/logo.png')
+
+def _open_static_image(*urls):
+    """The first of the /static/ URLs that opens as an image, loaded, or None."""
+    static_prefix = app.static_url_path + '/'
+    for url in urls:
+        if not url or not url.startswith(static_prefix):
+            continue
+        path = safe_join(app.static_folder, url[len(static_prefix):])
+        if path is None:
+            continue
+        try:
+            with PILImage.open(path) as img:
+                img.load()
+                return img
+        except (OSError, ValueError):
+            continue
+    return None
+
+def _square_icon(img, size):
+    """img scaled to fit a transparent size x size square, centred."""
+    img = ImageOps.contain(img, (size, size), PILImage.LANCZOS)
+    canvas = PILImage.new('RGBA', (size, size), (0, 0, 0, 0))
+    canvas.paste(img, ((size - img.width) // 2, (size - img.height) // 2), img)
+    return canvas
+
+def _icon(data, mimetype):
+    return Icon(data, mimetype, hashlib.sha256(data).hexdigest()[:16])
+
+def render_site_icons(settings_dict):
+    """
+    favicon.ico with one frame per FAVICON_SIZES, and icon-<size>.png plus
+    apple-touch-icon.png from the app icon. Icons whose source cannot be
+    opened are left out.
+    """
+    icons = {}
+    favicon = _open_static_image(settings_dict.get('site_favicon'), settings_dict.get('site_logo'),
+                                 '/static/logo.png')
+    if favicon is not None:
+        sizes = app.config['FAVICON_SIZES']
+        buffer = io.BytesIO()
+        frames = [_square_icon(ImageOps.exif_transpose(favicon).convert('RGBA'), size) for size in sizes]
+        frames[-1].save(buffer, format='ICO', sizes=[(size, size) for size in sizes],
+                        append_images=frames[:-1])
+        icons['favicon.ico'] = _icon(buffer.getvalue(), 'image/vnd.microsoft.icon')
+
+    app_icon = _open_static_image(app_icon_url(settings_dict), '/static/logo.png')
+    if app_icon is not None:
+        app_icon = ImageOps.exif_transpose(app_icon).convert('RGBA')
+        names = {f'icon-{size}.png': size for size in app.config['PWA_ICON_SIZES']}
+        names['apple-touch-icon.png'] = app.config['APPLE_TOUCH_ICON_SIZE']
+        for name, size in names.items():
+            buffer = io.BytesIO()
+            _square_icon(app_icon, size).save(buffer, format='PNG', optimize=True)
+            icons[name] = _icon(buffer.getvalue(), 'image/png')
+    return icons
+
+content_versions = ContentVersions()
+page_cache = PageCache()
+settings_snapshot = VersionedValue(SETTINGS_SCOPE, _load_settings)
+derivative_index = VersionedValue(IMAGES_SCOPE, _load_derivative_index)
+# Icon requests touch neither the database nor the disk
+site_icons = VersionedValue(SETTINGS_SCOPE,
+                            lambda: MappingProxyType(render_site_icons(settings_snapshot.current())))
+
+@metrics.collector
+def collect_cache_and_pool_metrics():
+    stats = page_cache.stats()
+    collected = {
+        'page_cache_hits_total': stats['hits'],
+        'page_cache_stale_hits_total': stats['stale_hits'],
+        'page_cache_misses_total': stats['misses'],
+        'page_cache_entries': stats['entries'],
+    }
+    pool = db.engine.pool
+    if hasattr(pool, 'checkedout'):
+        collected.update(db_pool_size=pool.size(), db_pool_checked_out=pool.checkedout(),
+                         db_pool_overflow=max(pool.overflow(), 0))
+    return collected
+
+def bump_content_version(*scopes):
+    """
+    Increment the version of each scope inside the current transaction (the caller
+    commits) and drop the matching rendered pages from this worker's cache.
+    All scopes move in one UPDATE; only scopes bumped for the first time cost
+    a second read and an insert.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    now = datetime.utcnow()
+    updated = ContentVersion.query.filter(ContentVersion.scope.in_(scopes)).update(
+        {ContentVersion.version: ContentVersion.version + 1, ContentVersion.updated_at: now},
+        synchronize_session=False
+    )
+    if updated < len(scopes):
+        existing = {scope for scope, in db.session.query(ContentVersion.scope)
+                    .filter(ContentVersion.scope.in_(scopes))}
+        db.session.execute(insert(ContentVersion), [{'scope': scope, 'version': 1, 'updated_at': now}
+                                                    for scope in sorted(scopes - existing)])
+
+    for scope in scopes:
+        if scope in (SETTINGS_SCOPE, IMAGES_SCOPE):
+            page_cache.invalidate()
+        elif scope.startswith('page:'):
+            page_cache.invalidate(scope[len('page:'):])
+    content_versions.expire()
+
+# Dialects whose INSERT supports ON CONFLICT, for save_settings()
+UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def save_settings(values, only_missing=False):
+    """
+    Write a key -> value mapping to SiteSettings in one read and one
+    INSERT ... ON CONFLICT statement. Rows are only written when their value
+    differs, so updated_at records real edits; with only_missing, existing keys
+    are left alone. Bumps SETTINGS_SCOPE once if anything changed and returns
+    the changed keys; the caller commits.
+    """
+    current = dict(db.session.query(SiteSettings.key, SiteSettings.value)
+                   .filter(SiteSettings.key.in_(values)))
+    changed = {key: value for key, value in values.items()
+               if key not in current or (not only_missing and current[key] != value)}
+    if not changed:
+        return []
+
+    now = datetime.utcnow()
+    insert = UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if insert is None:
+        for key, value in changed.items():
+            setting = SiteSettings.query.filter_by(key=key).first() or SiteSettings(key=key)
+            setting.value = value
+            db.session.add(setting)
+    else:
+        stmt = insert(SiteSettings).values([{'key': key, 'value': value, 'updated_at': now}
+                                            for key, value in changed.items()])
+        if only_missing:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['key'])
+        else:
+            # Re-checked in the statement in case another save landed since the read
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['key'],
+                set_={'value': stmt.excluded.value, 'updated_at': stmt.excluded.updated_at},
+                where=SiteSettings.value.is_distinct_from(stmt.excluded.value)
+            )
+        db.session.execute(stmt)
+    bump_content_version(SETTINGS_SCOPE)
+    return list(changed)
+
+def _load_asset_manifest():
+    """Original -> fingerprinted static path, written by build_assets.py; empty without a build."""
+    try:
+        with open(app.config['ASSET_MANIFEST']) as f:
+            return MappingProxyType(json.load(f))
+    except (OSError, ValueError):
+        return MappingProxyType({})
+
+asset_manifest = _load_asset_manifest()
+
+def _load_critical_css():
+    """Template name -> inline CSS; empty without a build, which keeps the blocking stylesheets."""
+    try:
+        with open(app.config['CRITICAL_CSS']) as f:
+            return MappingProxyType({template: Markup(entry['css']) for template, entry in json.load(f).items()})
+    except (OSError, ValueError, KeyError):
+        return MappingProxyType({})
+
+critical_css = _load_critical_css()
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    if endpoint == 'static' and values.get('filename') in asset_manifest:
+        values['filename'] = asset_manifest[values['filename']]
+
+def _compute_release_version():
+    """Digest of the templates, this module and the asset manifest, identical across workers of one deploy."""
+    digest = hashlib.sha1()
+    template_root = os.path.join(app.root_path, app.template_folder)
+    paths = [os.path.abspath(__file__)]
+    if asset_manifest:
+        paths.append(os.path.abspath(app.config['ASSET_MANIFEST']))
+    if critical_css:
+        paths.append(os.path.abspath(app.config['CRITICAL_CSS']))
+    for root, _, files in os.walk(template_root):
+        paths.extend(os.path.join(root, name) for name in files)
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, app.root_path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+app.config['RELEASE_VERSION'] = os.getenv('RELEASE_VERSION') or _compute_release_version()
+
+def site_root():
+    """
+    Scheme, host and prefix of absolute URLs, without a trailing slash: the
+    request's own for SITE_URL or one of ALLOWED_HOSTS, SITE_URL for any other.
+    It is part of every cache key and ETag that depends on the host. The static
+    export sets g.site_root to its base URL.
+    """
+    if g.get('site_root'):
+        return g.site_root
+    site_url = app.config['SITE_URL'].rstrip('/')
+    root = request.url_root.rstrip('/')
+    if root == site_url or (request.scheme in ('http', 'https') and not request.script_root
+                            and request.host in app.config['ALLOWED_HOSTS']):
+        return root
+    return site_url
+
+def content_etag(*parts):
+    raw = '|'.join(str(part) for part in (app.config['RELEASE_VERSION'],) + parts)
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+def conditional_response(etag, last_modified, build, cache_control='no-cache', compressible=True):
+    """
+    Answer with an empty 304 when the client's validators still match, without
+    calling build(); otherwise build the response and attach ETag/Last-Modified.
+    A 304 of a compressible response carries the Vary its 200 would have.
+    """
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = (last_modified is not None and request.if_modified_since is not None
+                        and request.if_modified_since >= last_modified)
+
+    if not_modified:
+        response = app.response_class(status=304)
+        if compressible:
+            response.vary.add('Accept-Encoding')
+    else:
+        response = make_response(build())
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -142,61 +843,164 @@ def load_user(user_id):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def save_content_addressed(stream, folder, ext):
+    """
+    Copy stream into folder while hashing it, and name the file after its SHA-256.
+    Returns (digest, filename, size); an identical file is never written twice.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(app.config['UPLOAD_CHUNK_SIZE']), b''):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        filename = f'{digest.hexdigest()}.{ext}'
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest(), filename, size
+
 @app.route('/set_language/<lang>')
 def set_language(lang):
-    if lang in app.config['LANGUAGES']:
-        session['language'] = lang
-    return redirect(request.referrer or url_for('index'))
-
-@app.route('/')
-def index():
-    lang = get_language()
-    page = Page.query.filter_by(slug='home', is_active=True).first()
-    if page:
-        sections = Section.query.filter_by(page_id=page.id, language_code=lang, is_active=True).order_by(Section.order_index).all()
-    else:
-        sections = []
-    return render_template('index.html', page=page, sections=sections, lang=lang)
-
-@app.route('/about')
-def about():
-    lang = get_language()
-    page = Page.query.filter_by(slug='about', is_active=True).first()
-    if page:
-        sections = Section.query.filter_by(page_id=page.id, language_code=lang, is_active=True).order_by(Section.order_index).all()
-    else:
-        sections = []
-    return render_template('about.html', page=page, sections=sections, lang=lang)
-
-@app.route('/services')
-def services():
-    lang = get_language()
-    page = Page.query.filter_by(slug='services', is_active=True).first()
-    if page:
-        sections = Section.query.filter_by(page_id=page.id, language_code=lang, is_active=True).order_by(Section.order_index).all()
-    else:
-        sections = []
-    return render_template('services.html', page=page, sections=sections, lang=lang)
-
-@app.route('/portfolio')
-def portfolio():
-    lang = get_language()
-    page = Page.query.filter_by(slug='portfolio', is_active=True).first()
-    if page:
-        sections = Section.query.filter_by(page_id=page.id, language_code=lang, is_active=True).order_by(Section.order_index).all()
-    else:
-        sections = []
-    return render_template('portfolio.html', page=page, sections=sections, lang=lang)
-
-@app.route('/contact')
-def contact():
-    lang = get_language()
-    page = Page.query.filter_by(slug='contact', is_active=True).first()
-    if page:
-        sections = Section.query.filter_by(page_id=page.id, language_code=lang, is_active=True).order_by(Section.order_index).all()
-    else:
-        sections = []
-    return render_template('contact.html', page=page, sections=sections, lang=lang)
+    # Legacy: the language switcher now links to /<lang>/... directly
+    if lang not in app.config['LANGUAGES']:
+        return redirect(request.referrer or url_for('index'))
+    session['language'] = lang
+    referrer = urlparse(request.referrer or '')
+    if referrer.path and referrer.netloc == request.host:
+        return redirect(localized_path(referrer.path, lang))
+    return redirect(url_for('index', lang=lang))
+
+def redirect_to_language():
+    """Send an unprefixed public URL to its /<lang>/ equivalent."""
+    lang = (session.get('language')
+            or request.accept_languages.best_match(app.config['LANGUAGES'])
+            or app.config['DEFAULT_LANGUAGE'])
+    location = localized_path(request.path, lang)
+    if request.query_string:
+        location += '?' + request.query_string.decode('latin-1')
+    response = redirect(location)
+    response.vary.update(('Cookie', 'Accept-Language'))
+    return response
+
+# Public pages: slug -> (URL path, template)
+PUBLIC_PAGES = {
+    'home': ('/', 'index.html'),
+    'about': ('/about', 'about.html'),
+    'services': ('/services', 'services.html'),
+    'portfolio': ('/portfolio', 'portfolio.html'),
+    'contact': ('/contact', 'contact.html'),
+}
+
+ERROR_TEMPLATES = {
+    400: 'errors/400.html',
+    403: 'errors/403.html',
+    404: 'errors/404.html',
+    451: 'errors/451.html',
+    500: 'errors/500.html',
+}
+
+LoadedPage = namedtuple('LoadedPage', ['page', 'sections', 'sections_by_type'])
+
+def load_page(slug, lang):
+    """
+    Fetch an active page and its active sections for lang, ordered, in a single
+    statement. sections_by_type groups the same sections by section_type so
+    templates look up a type instead of filtering the whole list each time.
+    page is None if the slug is unknown.
+    """
+    rows = (
+        db.session.query(Page, Section)
+        .outerjoin(Section, db.and_(
+            Section.page_id == Page.id,
+            Section.language_code == lang,
+            Section.is_active == True
+        ))
+        .filter(Page.slug == slug, Page.is_active == True)
+        .order_by(Section.order_index, Section.id)
+        .all()
+    )
+    if not rows:
+        return LoadedPage(None, [], {})
+
+    sections = []
+    sections_by_type = {}
+    for _, section in rows:
+        if section is not None:
+            sections.append(section)
+            sections_by_type.setdefault(section.section_type, []).append(section)
+    return LoadedPage(rows[0][0], sections, sections_by_type)
+
+def render_page(slug, template, lang):
+    return render_template(template, lang=lang, critical_css=critical_css.get(template),
+                           **load_page(slug, lang)._asdict())
+
+def render_public_page(slug, lang):
+    if lang is None:
+        return redirect_to_language()
+    template = PUBLIC_PAGES[slug][1]
+    cookieless = app.config['COOKIELESS_PUBLIC_PAGES']
+    # Flashed messages are per visitor, so such a render must not be shared
+    if not cookieless and session.get('_flashes'):
+        return render_page(slug, template, lang)
+
+    versions = content_versions.current()
+    version = (versions.get(page_scope(slug), 0), versions.get(SETTINGS_SCOPE, 0), versions.get(IMAGES_SCOPE, 0))
+
+    def build():
+        if not app.config['PAGE_CACHE_ENABLED']:
+            return render_page(slug, template, lang)
+        key = (slug, lang, site_root())
+        body = page_cache.get_or_render(key, version, lambda: render_page(slug, template, lang))
+        # Lets compress_response() reuse the cached compressed copy
+        g.page_cache_entry = (key, body)
+        return body
+
+    return conditional_response(
+        content_etag(slug, lang, site_root(), *version),
+        content_versions.last_modified(page_scope(slug), SETTINGS_SCOPE, IMAGES_SCOPE),
+        build,
+        cache_control=app.config['PUBLIC_CACHE_CONTROL'] if cookieless else 'no-cache'
+    )
+
+@app.route('/', defaults={'lang': None})
+@app.route(f'/{LANG_RULE}/')
+@query_budget(1)
+def index(lang):
+    return render_public_page('home', lang)
+
+@app.route('/about', defaults={'lang': None})
+@app.route(f'/{LANG_RULE}/about')
+@query_budget(1)
+def about(lang):
+    return render_public_page('about', lang)
+
+@app.route('/services', defaults={'lang': None})
+@app.route(f'/{LANG_RULE}/services')
+@query_budget(1)
+def services(lang):
+    return render_public_page('services', lang)
+
+@app.route('/portfolio', defaults={'lang': None})
+@app.route(f'/{LANG_RULE}/portfolio')
+@query_budget(1)
+def portfolio(lang):
+    return render_public_page('portfolio', lang)
+
+@app.route('/contact', defaults={'lang': None})
+@app.route(f'/{LANG_RULE}/contact')
+@query_budget(1)
+def contact(lang):
+    return render_public_page('contact', lang)
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -223,6 +1027,7 @@ def admin_logout():
     return redirect(url_for('index'))
 
 @app.route('/admin')
+@query_budget(3)
 @login_required
 def admin_dashboard():
     pages = Page.query.all()
@@ -231,6 +1036,7 @@ def admin_dashboard():
     return render_template('admin/dashboard.html', pages=pages, images=images, lang=lang)
 
 @app.route('/admin/pages')
+@query_budget(2)
 @login_required
 def admin_pages():
     pages = Page.query.all()
@@ -238,51 +1044,29 @@ def admin_pages():
     return render_template('admin/pages.html', pages=pages, lang=lang)
 
 @app.route('/admin/page/<int:page_id>')
+@query_budget(3)
 @login_required
 def admin_edit_page(page_id):
     page = Page.query.get_or_404(page_id)
-    all_sections = Section.query.filter_by(page_id=page_id).order_by(Section.order_index).all()
-    images = Image.query.order_by(Image.uploaded_at.desc()).all()
+    all_sections = Section.query.filter_by(page_id=page_id).order_by(Section.order_index, Section.id).all()
     lang = request.args.get('lang', 'fr')
     
-    paired = set()
-    section_groups = []
-    
-    for i, section in enumerate(all_sections):
-        if section.id in paired:
-            continue
-            
-        pair = {'fr': None, 'en': None}
-        pair[section.language_code] = section
-        paired.add(section.id)
-        
-        other_lang = 'en' if section.language_code == 'fr' else 'fr'
-        best_match = None
-        best_score = float('inf')
-        
-        for j, other_section in enumerate(all_sections[i+1:], start=i+1):
-            if (other_section.id in paired or 
-                other_section.language_code != other_lang or
-                other_section.section_type != section.section_type):
-                continue
-            
-            distance = abs(other_section.order_index - section.order_index)
-            
-            if distance < best_score:
-                best_score = distance
-                best_match = other_section
-                
-            if distance == 0:
-                break
-        
-        if best_match:
-            pair[other_lang] = best_match
-            paired.add(best_match.id)
-        
-        order_idx = section.order_index
-        section_groups.append(((order_idx, section.section_type), pair))
+    # One pass: sections sharing a translation group are shown side by side
+    groups = {}
+    for section in all_sections:
+        key = section.translation_group_id or f'section-{section.id}'
+        group = groups.get(key)
+        if group is None or group[1].get(section.language_code) is not None:
+            if group is not None:
+                key = f'section-{section.id}'
+            group = groups[key] = (
+                (section.order_index, section.section_type, section.translation_group_id or ''),
+                dict.fromkeys(app.config['LANGUAGES'])
+            )
+        group[1][section.language_code] = section
+    section_groups = list(groups.values())
     
-    return render_template('admin/edit_page.html', page=page, section_groups=section_groups, images=images, lang=lang)
+    return render_template('admin/edit_page.html', page=page, section_groups=section_groups, lang=lang)
 
 @app.route('/admin/page/<int:page_id>/update', methods=['POST'])
 @login_required
@@ -291,6 +1075,7 @@ def admin_update_page(page_id):
     page.title = request.form.get('title')
     page.meta_description = request.form.get('meta_description')
     page.is_active = 'is_active' in request.form
+    bump_content_version(page_scope(page.slug))
     db.session.commit()
     lang = request.form.get('lang', request.args.get('lang', 'fr'))
     flash('Page updated successfully', 'success')
@@ -308,6 +1093,7 @@ def admin_update_section(section_id):
     section.image_url = request.form.get('image_url')
     section.background_image = request.form.get('background_image')
     section.is_active = 'is_active' in request.form
+    bump_content_version(page_scope(section.page.slug))
     db.session.commit()
     lang = request.form.get('lang', request.args.get('lang', 'fr'))
     flash('Section updated successfully', 'success')
@@ -327,9 +1113,13 @@ def admin_create_section():
         heading=request.form.get('heading'),
         subheading=request.form.get('subheading'),
         content=request.form.get('content'),
-        order_index=int(order_index)
+        order_index=int(order_index),
+        # Set when adding a missing language to an existing section
+        translation_group_id=request.form.get('translation_group_id') or new_translation_group()
     )
     db.session.add(section)
+    page = Page.query.get_or_404(page_id)
+    bump_content_version(page_scope(page.slug))
     db.session.commit()
     lang = request.form.get('lang', request.args.get('lang', 'fr'))
     flash('Section created successfully', 'success')
@@ -342,31 +1132,24 @@ def admin_create_section_both():
     section_type = request.form.get('section_type', 'text')
     order_index = Section.query.filter_by(page_id=page_id).count()
     
-    section_fr = Section(
-        page_id=page_id,
-        section_type=section_type,
-        language_code='fr',
-        heading=request.form.get('heading_fr'),
-        subheading=request.form.get('subheading_fr'),
-        content=request.form.get('content_fr'),
-        order_index=order_index
-    )
-    db.session.add(section_fr)
-    
-    section_en = Section(
-        page_id=page_id,
-        section_type=section_type,
-        language_code='en',
-        heading=request.form.get('heading_en'),
-        subheading=request.form.get('subheading_en'),
-        content=request.form.get('content_en'),
-        order_index=order_index
-    )
-    db.session.add(section_en)
+    translation_group_id = new_translation_group()
+    for language_code in app.config['LANGUAGES']:
+        db.session.add(Section(
+            page_id=page_id,
+            section_type=section_type,
+            language_code=language_code,
+            heading=request.form.get(f'heading_{language_code}'),
+            subheading=request.form.get(f'subheading_{language_code}'),
+            content=request.form.get(f'content_{language_code}'),
+            order_index=order_index,
+            translation_group_id=translation_group_id
+        ))
     
+    page = Page.query.get_or_404(page_id)
+    bump_content_version(page_scope(page.slug))
     db.session.commit()
     lang = request.form.get('lang', request.args.get('lang', 'fr'))
-    flash('Sections created successfully for both languages', 'success')
+    flash('Sections created successfully for all languages', 'success')
     return redirect(url_for('admin_edit_page', page_id=page_id, lang=lang))
 
 @app.route('/admin/section/<int:section_id>/delete', methods=['POST'])
@@ -374,6 +1157,7 @@ def admin_create_section_both():
 def admin_delete_section(section_id):
     section = Section.query.get_or_404(section_id)
     page_id = section.page_id
+    bump_content_version(page_scope(section.page.slug))
     db.session.delete(section)
     db.session.commit()
     lang = request.form.get('lang', request.args.get('lang', 'fr'))
@@ -381,10 +1165,78 @@ def admin_delete_section(section_id):
     return redirect(url_for('admin_edit_page', page_id=page_id, lang=lang))
 
 @app.route('/admin/images')
+@query_budget(2)
 @login_required
 def admin_images():
-    images = Image.query.order_by(Image.uploaded_at.desc()).all()
-    return render_template('admin/images.html', images=images)
+    return render_template('admin/images.html', image_count=Image.query.count())
+
+def encode_image_cursor(uploaded_at, image_id):
+    return f'{uploaded_at.isoformat()}_{image_id}'
+
+def decode_image_cursor(cursor):
+    """(uploaded_at, id) from encode_image_cursor(); raises ValueError when malformed."""
+    uploaded_at, image_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(uploaded_at), int(image_id)
+
+def image_thumbnails(filenames):
+    """Static path of the smallest WebP derivative of each upload that has one."""
+    if not filenames:
+        return {}
+    sources = {f'uploads/{filename}': filename for filename in filenames}
+    rows = (db.session.query(ImageDerivative.source, ImageDerivative.filename)
+            .filter(ImageDerivative.source.in_(sources), ImageDerivative.format == 'webp')
+            .order_by(ImageDerivative.width.desc()))
+    # Narrowest last, so it wins
+    return {sources[source]: filename for source, filename in rows}
+
+@app.route('/admin/api/images')
+@query_budget(3)
+@login_required
+def admin_api_images():
+    """
+    One page of the image library, newest first, with only the columns the
+    pickers display. Pass next_cursor back as ?cursor= for the following page;
+    ?q= filters on the original filename and alt text.
+    """
+    limit = request.args.get('limit', app.config['IMAGE_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, app.config['IMAGE_PAGE_SIZE_MAX']))
+    query = db.session.query(Image.id, Image.filename, Image.original_filename, Image.alt_text,
+                             Image.width, Image.height, Image.uploaded_at)
+
+    search = request.args.get('q', '').strip().lower()
+    if search:
+        query = query.filter(image_search_text.contains(search, autoescape=True))
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            uploaded_at, image_id = decode_image_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(or_(Image.uploaded_at < uploaded_at,
+                                 and_(Image.uploaded_at == uploaded_at, Image.id < image_id)))
+
+    # One extra row tells whether there is a next page
+    rows = query.order_by(Image.uploaded_at.desc(), Image.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_image_cursor(rows[limit - 1].uploaded_at, rows[limit - 1].id) if len(rows) > limit else None
+    rows = rows[:limit]
+    thumbnails = image_thumbnails([row.filename for row in rows])
+
+    images = []
+    for row in rows:
+        url = f'/static/uploads/{row.filename}'
+        thumbnail = thumbnails.get(row.filename)
+        images.append({
+            'id': row.id,
+            'url': url,
+            # The original until the derivatives have been generated
+            'thumbnail_url': url_for('static', filename=thumbnail) if thumbnail else url,
+            'original_filename': row.original_filename,
+            'alt_text': row.alt_text or '',
+            'width': row.width,
+            'height': row.height
+        })
+    return jsonify({'images': images, 'next_cursor': next_cursor})
 
 @app.route('/admin/upload', methods=['POST'])
 @login_required
@@ -398,32 +1250,57 @@ def admin_upload():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        unique_filename = f"{secrets.token_hex(8)}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
-        
-        with PILImage.open(filepath) as img:
-            width, height = img.size
-        
-        file_size = os.path.getsize(filepath)
-        
-        image = Image(
-            filename=unique_filename,
-            original_filename=filename,
-            alt_text=request.form.get('alt_text', ''),
-            file_size=file_size,
-            width=width,
-            height=height
+        # Only the header is parsed here; this also rejects non-images early
+        try:
+            with PILImage.open(file.stream) as img:
+                width, height = img.size
+        except Exception:
+            return jsonify({'error': 'Invalid image file'}), 400
+        file.stream.seek(0)
+
+        ext = file.filename.rsplit('.', 1)[1].lower()
+        content_hash, unique_filename, file_size = save_content_addressed(
+            file.stream, app.config['UPLOAD_FOLDER'], ext
         )
-        db.session.add(image)
-        db.session.commit()
-        
+
+        image = Image.query.filter_by(content_hash=content_hash).first()
+        duplicate = image is not None
+        if not duplicate:
+            image = Image(
+                filename=unique_filename,
+                original_filename=filename,
+                alt_text=request.form.get('alt_text', ''),
+                file_size=file_size,
+                width=width,
+                height=height,
+                content_hash=content_hash
+            )
+            db.session.add(image)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # The same file was uploaded concurrently
+                db.session.rollback()
+                image = Image.query.filter_by(content_hash=content_hash).one()
+                duplicate = True
+
+        if duplicate and image.filename != unique_filename:
+            # Same content stored earlier under another extension or name
+            orphan = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+            if os.path.exists(orphan):
+                os.remove(orphan)
+
+        if not duplicate:
+            from image_derivatives import submit
+            submit(f'uploads/{image.filename}', image.id)
+
         return jsonify({
             'success': True,
+            'duplicate': duplicate,
             'image': {
                 'id': image.id,
-                'url': f'/static/uploads/{unique_filename}',
-                'filename': unique_filename
+                'url': f'/static/uploads/{image.filename}',
+                'filename': image.filename
             }
         })
     
@@ -432,47 +1309,53 @@ def admin_upload():
 @app.route('/admin/image/<int:image_id>/delete', methods=['POST'])
 @login_required
 def admin_delete_image(image_id):
+    from image_derivatives import remove
     image = Image.query.get_or_404(image_id)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], image.filename)
     if os.path.exists(filepath):
         os.remove(filepath)
+    remove(f'uploads/{image.filename}')
     db.session.delete(image)
+    bump_content_version(IMAGES_SCOPE)
     db.session.commit()
     flash('Image deleted successfully', 'success')
     return redirect(url_for('admin_images'))
 
+@app.route('/admin/metrics')
+def admin_metrics():
+    token = app.config['METRICS_TOKEN']
+    # Header values are decoded as latin-1; compare_digest() rejects non-ASCII str
+    bearer = request.headers.get('Authorization', '').encode('latin-1')
+    if not (token and hmac.compare_digest(bearer, f'Bearer {token}'.encode())) and not current_user.is_authenticated:
+        return login_manager.unauthorized()
+    if not app.config['METRICS_ENABLED']:
+        abort(404)
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/export-static', methods=['POST'])
+@login_required
+def admin_export_static():
+    from export_static import start_export
+    if start_export():
+        flash('Static export started. Pages are re-rendered in the background.', 'success')
+    else:
+        flash('A static export is already running.', 'error')
+    return redirect(url_for('admin_dashboard'))
+
 @app.route('/admin/normalize-sections')
 @login_required
 def normalize_sections():
-    pages = Page.query.all()
-    for page in pages:
-        sections_by_type_lang = {}
-        for section in Section.query.filter_by(page_id=page.id).order_by(Section.order_index).all():
-            key = (section.section_type, section.language_code)
-            if key not in sections_by_type_lang:
-                sections_by_type_lang[key] = []
-            sections_by_type_lang[key].append(section)
-        
-        new_order = 0
-        section_types_seen = set()
-        for section_type in set(st for st, _ in sections_by_type_lang.keys()):
-            if section_type in section_types_seen:
-                continue
-            section_types_seen.add(section_type)
-            
-            fr_sections = sections_by_type_lang.get((section_type, 'fr'), [])
-            en_sections = sections_by_type_lang.get((section_type, 'en'), [])
-            
-            max_pairs = max(len(fr_sections), len(en_sections))
-            for i in range(max_pairs):
-                if i < len(fr_sections):
-                    fr_sections[i].order_index = new_order
-                if i < len(en_sections):
-                    en_sections[i].order_index = new_order
-                new_order += 1
-    
-    db.session.commit()
-    flash('Sections normalized successfully! All FR/EN pairs now share the same order_index.', 'success')
+    from normalize_sections import normalize
+    result = normalize(dry_run=request.args.get('dry_run') == '1')
+    if result.dry_run:
+        return jsonify({
+            'changes': [change._asdict() for change in result.changes],
+            'sections': result.sections,
+            'pages': result.pages,
+            'milliseconds': round(result.seconds * 1000, 1)
+        })
+    flash(f'Sections normalized: {len(result.changes)} of {result.sections} updated on {result.pages} pages '
+          f'in {result.seconds * 1000:.0f} ms. All language versions now share the same order_index.', 'success')
     return redirect(url_for('admin_dashboard'))
 
 @app.route('/admin/init-db')
@@ -623,6 +1506,8 @@ def init_db():
                         section = Section(page_id=page.id, **section_data)
                         db.session.add(section)
         
+        assign_translation_groups()
+        bump_content_version(*(page_scope(page.slug) for page in Page.query.all()))
         db.session.commit()
         flash('Database initialized successfully!', 'success')
         return redirect(url_for('admin_dashboard'))
@@ -650,25 +1535,13 @@ def admin_settings():
             ('pwa_background_color', request.form.get('pwa_background_color'))
         ]
         
-        for key, value in settings_to_update:
-            if value is not None:
-                setting = SiteSettings.query.filter_by(key=key).first()
-                if setting:
-                    setting.value = value
-                else:
-                    setting = SiteSettings(key=key, value=value)
-                    db.session.add(setting)
-        
+        save_settings({key: value for key, value in settings_to_update if value is not None})
         db.session.commit()
         flash('Settings updated successfully', 'success')
         return redirect(url_for('admin_settings'))
     
-    settings_dict = {}
-    for setting in SiteSettings.query.all():
-        settings_dict[setting.key] = setting.value
-    
-    images = Image.query.order_by(Image.uploaded_at.desc()).all()
-    return render_template('admin/settings.html', settings=settings_dict, images=images)
+    settings_dict = settings_snapshot.current()
+    return render_template('admin/settings.html', settings=settings_dict)
 
 @app.route('/admin/upload-logo', methods=['POST'])
 @login_required
@@ -685,14 +1558,12 @@ def admin_upload_logo():
         filepath = os.path.join('static', filename)
         file.save(filepath)
         
-        setting = SiteSettings.query.filter_by(key='site_logo').first()
-        if setting:
-            setting.value = f'/static/{filename}'
-        else:
-            setting = SiteSettings(key='site_logo', value=f'/static/{filename}')
-            db.session.add(setting)
-        
+        # The URL stays the same when the extension does, but the file changed
+        if not save_settings({'site_logo': f'/static/{filename}'}):
+            bump_content_version(SETTINGS_SCOPE)
         db.session.commit()
+        # Render the new icons now rather than on the next icon request
+        site_icons.current()
         
         return jsonify({
             'success': True,
@@ -716,14 +1587,12 @@ def admin_upload_pwa_icon():
         filepath = os.path.join('static', filename)
         file.save(filepath)
 
-        setting = SiteSettings.query.filter_by(key='pwa_icon_url').first()
-        if setting:
-            setting.value = f'/static/{filename}'
-        else:
-            setting = SiteSettings(key='pwa_icon_url', value=f'/static/{filename}')
-            db.session.add(setting)
-
+        # The URL stays the same when the extension does, but the file changed
+        if not save_settings({'pwa_icon_url': f'/static/{filename}'}):
+            bump_content_version(SETTINGS_SCOPE)
         db.session.commit()
+        # Render the new icons now rather than on the next icon request
+        site_icons.current()
 
         return jsonify({
             'success': True,
@@ -764,14 +1633,10 @@ def admin_upload_favicon():
 
         file.save(filepath)
 
-        setting = SiteSettings.query.filter_by(key='site_favicon').first()
-        if setting:
-            setting.value = f'/static/{filename}'
-        else:
-            setting = SiteSettings(key='site_favicon', value=f'/static/{filename}')
-            db.session.add(setting)
-
+        save_settings({'site_favicon': f'/static/{filename}'})
         db.session.commit()
+        # Render the new icons now rather than on the next icon request
+        site_icons.current()
 
         return jsonify({
             'success': True,
@@ -780,44 +1645,84 @@ def admin_upload_favicon():
 
     return jsonify({'error': 'Invalid file type'}), 400
 
+def site_icon_url(name):
+    """Versioned URL of one of the in-memory icons, cacheable for a year."""
+    icon = site_icons.current().get(name)
+    endpoint, args = ('favicon', {}) if name == 'favicon.ico' else ('site_icon', {'name': name})
+    if icon is not None:
+        args['v'] = icon.etag
+    return url_for(endpoint, **args)
+
+def _serve_icon(name):
+    icon = site_icons.current().get(name)
+    if icon is None:
+        abort(404)
+    if request.args.get('v') == icon.etag:
+        cache_control = f"public, max-age={app.config['IMMUTABLE_CACHE_MAX_AGE']}, immutable"
+    else:
+        cache_control = f"public, max-age={app.config['ICON_CACHE_MAX_AGE']}"
+    return conditional_response(icon.etag, None,
+                                lambda: app.response_class(icon.data, mimetype=icon.mimetype),
+                                cache_control=cache_control, compressible=False)
+
 @app.route('/favicon.ico')
+@query_budget(0)
 def favicon():
-    setting = SiteSettings.query.filter_by(key='site_favicon').first()
-    if setting and setting.value:
-         # Remove leading slash for send_from_directory if present, but typically send_from_directory needs path relative to root provided
-         # If value is /static/favicon.png, we want to serve static/favicon.png
-         # But usually favicon.ico is requested at root.
+    return _serve_icon('favicon.ico')
 
-         filename = setting.value.split('/')[-1]
-         return send_from_directory('static', filename, mimetype='image/vnd.microsoft.icon')
-    return send_from_directory('static', 'logo.png', mimetype='image/vnd.microsoft.icon')
+@app.route('/apple-touch-icon.png', defaults={'name': 'apple-touch-icon.png'})
+@app.route('/icons/<name>')
+@query_budget(0)
+def site_icon(name):
+    return _serve_icon(name)
 
 def get_setting(key, default=''):
-    setting = SiteSettings.query.filter_by(key=key).first()
-    return setting.value if setting else default
+    return settings_snapshot.current().get(key, default)
+
+def responsive_image(src):
+    """
+    URL and <source> candidates for an image given as a path under static/
+    ('images/hero.jpg') or as an uploaded URL ('/static/uploads/ab12_photo.jpg').
+    """
+    if not src:
+        return ResponsiveImage(src, ())
+    static_prefix = app.static_url_path + '/'
+    if src.startswith(static_prefix):
+        source, url = src[len(static_prefix):], src
+    elif '://' in src or src.startswith('/'):
+        return ResponsiveImage(src, ())
+    else:
+        source, url = src, url_for('static', filename=src)
+    return ResponsiveImage(url, derivative_index.current().get(source, ()))
 
 @app.route('/manifest.json')
+@query_budget(0)
 def manifest():
-    settings_dict = {}
-    for setting in SiteSettings.query.all():
-        settings_dict[setting.key] = setting.value
+    settings_dict = settings_snapshot.current()
 
     pwa_enabled = settings_dict.get('pwa_enabled', 'false') == 'true'
 
     if not pwa_enabled:
         return jsonify({}), 404
 
+    lang = request.args.get('lang')
+    if lang not in app.config['LANGUAGES']:
+        lang = app.config['DEFAULT_LANGUAGE']
+    return conditional_response(
+        content_etag('manifest', lang, content_versions.current().get(SETTINGS_SCOPE, 0)),
+        content_versions.last_modified(SETTINGS_SCOPE),
+        lambda: _build_manifest(settings_dict, lang)
+    )
+
+def _build_manifest(settings_dict, lang):
     display_mode = settings_dict.get('pwa_display_mode', 'default')
 
     if display_mode == 'custom':
         name = settings_dict.get('pwa_app_name', 'Bellari Concept')
         short_name = settings_dict.get('pwa_short_name', 'Bellari')
-        icon_url = settings_dict.get('pwa_icon_url', '/static/logo.png')
     else:
-        lang = get_language()
         name = settings_dict.get(f'site_name_{lang}', 'Bellari Concept')
         short_name = name[:12]
-        icon_url = settings_dict.get('site_logo', '/static/logo.png')
 
     manifest_data = {
         "name": name,
@@ -829,63 +1734,170 @@ def manifest():
         "description": settings_dict.get('pwa_description', ''),
         "icons": [
             {
-                "src": icon_url,
-                "sizes": "192x192",
-                "type": "image/png"
-            },
-            {
-                "src": icon_url,
-                "sizes": "512x512",
+                "src": site_icon_url(f'icon-{size}.png'),
+                "sizes": f"{size}x{size}",
                 "type": "image/png"
             }
+            for size in app.config['PWA_ICON_SIZES']
         ]
     }
 
     return jsonify(manifest_data)
 
+SERVICE_WORKER_CACHE_PREFIX = 'bellari-'
+# Fingerprinted assets the public pages never load
+SERVICE_WORKER_SKIP_ASSETS = ('admin-', 'demo-')
+
+@app.route('/sw.js')
+@query_budget(0)
+def service_worker():
+    # Served from the root so its scope covers the whole site
+    versions = content_versions.current()
+    version = content_etag('sw', *sorted(versions.items()))
+    return conditional_response(
+        version,
+        content_versions.last_modified(),
+        lambda: _build_service_worker(version)
+    )
+
+def _build_service_worker(version):
+    pages = [localized_path(path, lang)
+             for lang in app.config['LANGUAGES']
+             for path, _ in PUBLIC_PAGES.values()]
+    assets = [url_for('static', filename=name) for name in sorted(asset_manifest)
+              if name.startswith(('css/', 'js/'))
+              and not os.path.basename(name).startswith(SERVICE_WORKER_SKIP_ASSETS)]
+    response = make_response(render_template(
+        'sw.js',
+        cache_name=f'{SERVICE_WORKER_CACHE_PREFIX}{version}',
+        cache_prefix=SERVICE_WORKER_CACHE_PREFIX,
+        precache_urls=pages + assets,
+        offline_url=localized_path('/', app.config['DEFAULT_LANGUAGE']),
+        immutable_prefixes=[f'{app.static_url_path}/{prefix}' for prefix in IMMUTABLE_STATIC_PREFIXES]
+    ))
+    response.mimetype = 'application/javascript'
+    return response
+
 @app.route('/sitemap.xml')
+@query_budget(1)
 def sitemap():
-    from flask import Response
-    from urllib.parse import urljoin
-    
-    base_url = request.url_root.rstrip('/')
-    
-    pages_xml = []
-    pages_xml.append('<?xml version="1.0" encoding="UTF-8"?>')
-    pages_xml.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-    
-    pages = Page.query.filter_by(is_active=True).all()
-    
-    for page in pages:
-        if page.slug == 'home':
-            loc = base_url + '/'
-        else:
-            loc = base_url + '/' + page.slug
-        
-        lastmod = page.updated_at.strftime('%Y-%m-%d') if page.updated_at else datetime.utcnow().strftime('%Y-%m-%d')
-        
-        priority = '1.0' if page.slug == 'home' else '0.8'
-        
-        pages_xml.append('  <url>')
-        pages_xml.append(f'    <loc>{loc}</loc>')
-        pages_xml.append(f'    <lastmod>{lastmod}</lastmod>')
-        pages_xml.append('    <changefreq>weekly</changefreq>')
-        pages_xml.append(f'    <priority>{priority}</priority>')
-        pages_xml.append('  </url>')
-    
-    pages_xml.append('</urlset>')
-    
-    sitemap_xml = '\n'.join(pages_xml)
-    
-    response = Response(sitemap_xml, mimetype='application/xml')
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    return response
+    return _sitemap_response(None)
+
+@app.route('/sitemap-<int:part>.xml')
+@query_budget(1)
+def sitemap_part(part):
+    return _sitemap_response(part)
+
+def _sitemap_response(part):
+    versions = content_versions.current()
+    version = tuple(sorted(versions.items()))
+
+    def build():
+        if not app.config['PAGE_CACHE_ENABLED']:
+            return app.response_class(stream_with_context(_sitemap_chunks(part)), mimetype='application/xml')
+        # Cached like the pages, until the next content write
+        key = ('sitemap', part, site_root())
+        body = page_cache.get_or_render(key, version, lambda: ''.join(_sitemap_chunks(part)))
+        g.page_cache_entry = (key, body)
+        return app.response_class(body, mimetype='application/xml')
+
+    return conditional_response(
+        content_etag('sitemap', part, site_root(), *version),
+        content_versions.last_modified(),
+        build,
+        cache_control='public, no-cache'
+    )
+
+def _sitemap_urls():
+    """(path, language, lastmod, priority) of every public URL, in PUBLIC_PAGES order."""
+    updated = dict(db.session.query(Page.slug, Page.updated_at).filter_by(is_active=True))
+    urls = []
+    for slug, (url_path, _) in PUBLIC_PAGES.items():
+        if slug not in updated:
+            continue
+        # Section writes only move the page's content version
+        times = [t for t in (updated[slug], content_versions.last_modified(page_scope(slug))) if t]
+        lastmod = max(times) if times else datetime.utcnow()
+        priority = '1.0' if slug == 'home' else '0.8'
+        for lang in app.config['LANGUAGES']:
+            urls.append((url_path, lang, lastmod, priority))
+    return urls
+
+def sitemap_part_count(urls=None):
+    """Number of /sitemap-<n>.xml files, or 0 when /sitemap.xml lists the URLs itself."""
+    total = len(_sitemap_urls() if urls is None else urls)
+    size = app.config['SITEMAP_MAX_URLS']
+    return 0 if total <= size else -(-total // size)
+
+def _sitemap_chunks(part):
+    """
+    The XML of /sitemap.xml (part None) or /sitemap-<part>.xml as an iterator
+    of strings. Raises NotFound for a part that does not exist.
+    """
+    base_url = site_root()
+    urls = _sitemap_urls()
+    parts = sitemap_part_count(urls)
+    if part is None and parts:
+        return _iter_sitemap_index(base_url, parts)
+    if part is not None:
+        if not 1 <= part <= parts:
+            abort(404)
+        size = app.config['SITEMAP_MAX_URLS']
+        urls = urls[(part - 1) * size:part * size]
+    return _iter_urlset(base_url, urls)
+
+def _w3c_datetime(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+def _iter_urlset(base_url, urls):
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+           'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n')
+    languages = app.config['LANGUAGES']
+    for url_path, lang, lastmod, priority in urls:
+        # Every language version lists all of them, itself included
+        alternates = [(alt, localized_path(url_path, alt)) for alt in languages]
+        alternates.append(('x-default', localized_path(url_path, app.config['DEFAULT_LANGUAGE'])))
+        links = ''.join(f'    <xhtml:link rel="alternate" hreflang="{hreflang}" href="{escape(base_url + path)}"/>\n'
+                        for hreflang, path in alternates)
+        yield (f'  <url>\n'
+               f'    <loc>{escape(base_url + localized_path(url_path, lang))}</loc>\n'
+               f'{links}'
+               f'    <lastmod>{_w3c_datetime(lastmod)}</lastmod>\n'
+               f'    <changefreq>weekly</changefreq>\n'
+               f'    <priority>{priority}</priority>\n'
+               f'  </url>\n')
+    yield '</urlset>\n'
+
+def _iter_sitemap_index(base_url, parts):
+    lastmod = content_versions.last_modified() or datetime.utcnow()
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    for part in range(1, parts + 1):
+        yield (f'  <sitemap>\n'
+               f'    <loc>{escape(base_url)}/sitemap-{part}.xml</loc>\n'
+               f'    <lastmod>{_w3c_datetime(lastmod)}</lastmod>\n'
+               f'  </sitemap>\n')
+    yield '</sitemapindex>\n'
+
+def _build_sitemap(part=None):
+    """Uncached sitemap response, for the static export."""
+    return app.response_class(''.join(_sitemap_chunks(part)), mimetype='application/xml')
 
 @app.route('/robots.txt')
+@query_budget(0)
 def robots():
+    return conditional_response(
+        content_etag('robots', site_root()),
+        None,
+        _build_robots,
+        cache_control='public, no-cache'
+    )
+
+def _build_robots():
     from flask import Response
     
-    base_url = request.url_root.rstrip('/')
+    base_url = site_root()
     
     robots_txt = f"""# Robots.txt for Bellari Concept
 
@@ -951,9 +1963,7 @@ Disallow: /
 Sitemap: {base_url}/sitemap.xml
 """
     
-    response = Response(robots_txt, mimetype='text/plain')
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    return response
+    return Response(robots_txt, mimetype='text/plain')
 
 @app.route('/demo/responsive-table')
 def demo_responsive_table():
@@ -1031,15 +2041,17 @@ def forbidden(e):
 def internal_server_error(e):
     return render_template('errors/500.html', lang=get_language()), 500
 
-app.jinja_env.globals.update(get_setting=get_setting)
+app.jinja_env.globals.update(get_setting=get_setting, localized_path=localized_path,
+                             responsive_image=responsive_image, site_icon_url=site_icon_url, site_root=site_root)
 
 with app.app_context():
     try:
-        from init_db import check_and_migrate_schema, init_settings, init_content
-        # Run robust initialization on startup
-        check_and_migrate_schema()
-        init_settings()
-        init_content()
+        from init_db import schema_is_current, check_and_migrate_schema, init_settings, init_content
+        # A single version lookup on boot; migrations and seeding only run when the schema is behind
+        if not schema_is_current():
+            check_and_migrate_schema()
+            init_settings()
+            init_content()
     except Exception as e:
         print(f"Startup initialization error: {e}")
 
@@ -0,0 +1,414 @@
+"""
+Reproducible benchmark of the public site and the heavy admin views.
+
+Builds a synthetic SQLite database, the default content of init_db.py plus
+--pages pages, --sections sections per page and language, --images images and
+--settings extra settings, then requests every public page in each language,
+/sitemap.xml, /manifest.json, /favicon.ico, admin_dashboard and admin_pages
+(which list every page), admin_edit_page, admin_images, the image library feed
+and admin_settings:
+
+  - in process, with the Flask test client, counting SQL statements per request;
+  - with --gunicorn, also over HTTP against `gunicorn main:app` on the same
+    database, from --concurrency client threads.
+
+Each route gets --warmup untimed requests, then --requests timed ones. The
+report gives p50/p95/p99 latency, requests per second, statements per request
+and peak RSS, and is saved as JSON, by default build/benchmarks/<commit>.json,
+so that runs can be compared across commits with --compare:
+
+    python3 benchmark.py [--requests 200] [--gunicorn] [--compare build/benchmarks/abc1234.json]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import resource
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SECTION_TYPES = ['hero', 'text', 'expertise', 'why_us', 'cta']
+LOREM = ('Bellari Concept imagine des intérieurs sur mesure, du premier croquis à la livraison, '
+         'avec des matériaux choisis pour durer. ') * 4
+# Synthetic rows are dated from here, so every build is identical
+EPOCH = datetime(2024, 1, 1)
+BENCHMARK_USERNAME = 'benchmark'
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+def build_database(pages, sections, images, settings):
+    """Migrate and seed a fresh database, add the synthetic rows and return the admin password."""
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+
+    # Importing app migrates and seeds an empty database already
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import (app, db, Image, Page, Section, User, bump_content_version, new_translation_group,
+                         page_scope, save_settings)
+        from init_db import check_and_migrate_schema, init_content, init_settings
+        check_and_migrate_schema()
+        init_settings()
+        init_content()
+
+    with app.app_context():
+        slugs = [slug for slug, in db.session.query(Page.slug)]
+        for i in range(len(slugs), pages):
+            db.session.add(Page(slug=f'bench-{i}', title=f'Page {i} - Bellari Concept',
+                                meta_description=LOREM[:150], updated_at=EPOCH))
+        db.session.flush()
+
+        rows = []
+        for page_id, in db.session.query(Page.id).order_by(Page.id):
+            for position in range(sections):
+                group_id = new_translation_group()
+                for lang in app.config['LANGUAGES']:
+                    rows.append({
+                        'page_id': page_id, 'section_type': SECTION_TYPES[position % len(SECTION_TYPES)],
+                        'language_code': lang, 'order_index': 100 + position,
+                        'heading': f'Section {position} ({lang})', 'subheading': LOREM[:120],
+                        'content': LOREM, 'button_text': 'Contact', 'button_link': '/contact',
+                        'translation_group_id': group_id, 'is_active': True, 'created_at': EPOCH,
+                    })
+        if rows:
+            db.session.execute(insert(Section), rows)
+
+        rows = [{
+            'filename': f'bench-{i:06d}.jpg', 'original_filename': f'projet-{i:06d}.jpg',
+            'alt_text': f'Projet {i}', 'file_size': 250_000, 'width': 2400, 'height': 1600,
+            'content_hash': hashlib.sha256(str(i).encode()).hexdigest(),
+            'uploaded_at': EPOCH + timedelta(seconds=i),
+        } for i in range(images)]
+        if rows:
+            db.session.execute(insert(Image), rows)
+
+        values = {f'bench_setting_{i}': f'value {i}' for i in range(settings)}
+        values['pwa_enabled'] = 'true'
+        save_settings(values)
+
+        password = secrets.token_urlsafe(16)
+        db.session.add(User(username=BENCHMARK_USERNAME, password_hash=generate_password_hash(password)))
+        bump_content_version(*(page_scope(slug) for slug, in db.session.query(Page.slug)))
+        db.session.commit()
+        dataset = {
+            'pages': db.session.query(Page).count(),
+            'sections': db.session.query(Section).count(),
+            'images': db.session.query(Image).count(),
+            'settings': len(values),
+        }
+        db.session.remove()
+    return password, dataset
+
+
+def routes():
+    """(name, path, admin) of every benchmarked route."""
+    from app import app, db, Page, PUBLIC_PAGES, localized_path
+
+    result = []
+    for lang in app.config['LANGUAGES']:
+        for slug, (url_path, _) in PUBLIC_PAGES.items():
+            result.append((f'{slug} [{lang}]', localized_path(url_path, lang), False))
+    result += [
+        ('sitemap.xml', '/sitemap.xml', False),
+        ('manifest.json', '/manifest.json', False),
+        ('favicon.ico', '/favicon.ico', False),
+    ]
+    with app.app_context():
+        page_id = db.session.query(Page.id).filter_by(slug='home').scalar()
+        db.session.remove()
+    result += [
+        ('admin_dashboard', '/admin', True),
+        ('admin_pages', '/admin/pages', True),
+        ('admin_edit_page', f'/admin/page/{page_id}?lang={app.config["DEFAULT_LANGUAGE"]}', True),
+        ('admin_images', '/admin/images', True),
+        ('admin_api_images', '/admin/api/images', True),
+        ('admin_settings', '/admin/settings', True),
+    ]
+    return result
+
+
+def summarize(latencies, elapsed, statuses, queries=None):
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        # Nearest rank
+        return round(ordered[max(0, -(-len(ordered) * p // 100) - 1)] * 1000, 3)
+
+    summary = {
+        'requests': len(ordered),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'requests_per_second': round(len(ordered) / elapsed, 1),
+        'statuses': {str(status): statuses.count(status) for status in sorted(set(statuses))},
+    }
+    if queries is not None:
+        summary['queries_per_request'] = round(sum(queries) / len(queries), 2)
+        summary['queries_max'] = max(queries)
+    return summary
+
+
+def run_test_client(password, warmup, requests):
+    from app import app
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    counter = [0]
+
+    def count(*args):
+        counter[0] += 1
+
+    event.listen(Engine, 'after_cursor_execute', count)
+    headers = {'Accept-Encoding': ACCEPT_ENCODING}
+    public, admin = app.test_client(), app.test_client()
+    response = admin.post('/admin/login', data={'username': BENCHMARK_USERNAME, 'password': password})
+    if response.status_code != 302:
+        sys.exit(f'Benchmark login failed with status {response.status_code}.')
+
+    results = {}
+    try:
+        for name, path, is_admin in routes():
+            client = admin if is_admin else public
+            for _ in range(warmup):
+                client.get(path, headers=headers)
+            latencies, statuses, queries = [], [], []
+            started = time.perf_counter()
+            for _ in range(requests):
+                before = counter[0]
+                request_started = time.perf_counter()
+                response = client.get(path, headers=headers)
+                response.get_data()
+                latencies.append(time.perf_counter() - request_started)
+                statuses.append(response.status_code)
+                queries.append(counter[0] - before)
+            results[name] = summarize(latencies, time.perf_counter() - started, statuses, queries)
+    finally:
+        event.remove(Engine, 'after_cursor_execute', count)
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'routes': results, 'peak_rss_kb': peak // 1024 if sys.platform == 'darwin' else peak}
+
+
+class HttpClient:
+    """Minimal client keeping the session cookie by hand: it is Secure, which urllib would not send over http."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.cookies = {}
+
+    def request(self, path, data=None):
+        headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in self.cookies.items())
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers)
+        try:
+            response = urllib.request.build_opener(_NoRedirect).open(request, timeout=30)
+        except urllib.error.HTTPError as exc:
+            response = exc
+        with response:
+            response.read()
+            for header in response.headers.get_all('Set-Cookie') or []:
+                for key, morsel in SimpleCookie(header).items():
+                    self.cookies[key] = morsel.value
+            return response.status
+
+    def login(self, password):
+        with urllib.request.urlopen(self.base_url + '/admin/login', timeout=30) as response:
+            token = re.search(r'name="csrf_token" value="([^"]+)"', response.read().decode()).group(1)
+            for header in response.headers.get_all('Set-Cookie') or []:
+                for key, morsel in SimpleCookie(header).items():
+                    self.cookies[key] = morsel.value
+        status = self.request('/admin/login', {'username': BENCHMARK_USERNAME, 'password': password,
+                                               'csrf_token': token})
+        if status != 302:
+            sys.exit(f'Benchmark login over HTTP failed with status {status}.')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _peak_rss_kb(pid):
+    """VmHWM of pid and of each of its children, Linux only."""
+    peaks = {}
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return None
+    for process in [pid] + children:
+        try:
+            with open(f'/proc/{process}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        peaks['master' if process == pid else f'worker {process}'] = int(line.split()[1])
+        except OSError:
+            continue
+    return peaks
+
+
+def run_gunicorn(password, warmup, requests, workers, concurrency):
+    if shutil.which('gunicorn') is None:
+        sys.exit('gunicorn is not installed; run without --gunicorn or install requirements.txt.')
+    port = _free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen(['gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers), 'main:app'],
+                               cwd=ROOT, env=os.environ.copy(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                with urllib.request.urlopen(base_url + '/robots.txt', timeout=1):
+                    break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    sys.exit('gunicorn did not start.')
+                time.sleep(0.2)
+
+        results = {}
+        for name, path, is_admin in routes():
+            clients = [HttpClient(base_url) for _ in range(concurrency)]
+            if is_admin:
+                for client in clients:
+                    client.login(password)
+            for _ in range(warmup):
+                clients[0].request(path)
+            latencies, statuses = [], []
+            lock = threading.Lock()
+
+            def work(client, count):
+                for _ in range(count):
+                    started = time.perf_counter()
+                    status = client.request(path)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        statuses.append(status)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+                list(executor.map(work, clients, shares))
+            results[name] = summarize(latencies, time.perf_counter() - started, statuses)
+        return {'routes': results, 'workers': workers, 'concurrency': concurrency,
+                'peak_rss_kb': _peak_rss_kb(process.pid)}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def _commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def print_report(result, previous=None):
+    for mode in ('test_client', 'gunicorn'):
+        run = result.get(mode)
+        if run is None:
+            continue
+        print(f"\n{mode.replace('_', ' ')} (peak RSS {run['peak_rss_kb']} kB)")
+        print(f"  {'route':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}")
+        for name, stats in run['routes'].items():
+            line = (f"  {name:<22}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                    f"{stats['requests_per_second']:>9}{stats.get('queries_per_request', '-'):>9}")
+            before = ((previous or {}).get(mode) or {}).get('routes', {}).get(name)
+            if before:
+                change = (stats['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+                line += f"  p50 {change:+.0f}% vs {previous['commit']}"
+            if set(stats['statuses']) - {'200'}:
+                line += f"  statuses {stats['statuses']}"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the public and admin routes on a synthetic database.')
+    parser.add_argument('--pages', type=int, default=20, help='Pages in total, the five public ones included')
+    parser.add_argument('--sections', type=int, default=12, help='Synthetic sections per page and language')
+    parser.add_argument('--images', type=int, default=2000, help='Image rows')
+    parser.add_argument('--settings', type=int, default=50, help='Extra settings')
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per route first')
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'bellari-benchmark.db'),
+                        help='SQLite file, rebuilt on every run')
+    parser.add_argument('--gunicorn', action='store_true', help='Also benchmark a real gunicorn process')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads against gunicorn')
+    parser.add_argument('--output', help='JSON report path (default build/benchmarks/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier JSON report to compare p50 latencies with')
+    args = parser.parse_args()
+
+    # Read by app.py at import time, and inherited by gunicorn
+    for suffix in ('', '-wal', '-shm'):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(args.database + suffix)
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.database)}'
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='bellari-benchmark-metrics-')
+    os.environ.setdefault('SESSION_SECRET', secrets.token_hex(32))
+    os.environ.setdefault('FORCE_HTTPS', 'false')
+    os.chdir(ROOT)
+
+    print(f"Building the database in {args.database}...")
+    password, dataset = build_database(args.pages, args.sections, args.images, args.settings)
+    print(f"  {dataset['pages']} pages, {dataset['sections']} sections, {dataset['images']} images, "
+          f"{dataset['settings']} settings")
+
+    result = {
+        'commit': _commit(),
+        'date': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'dataset': dataset,
+    }
+    print("Running against the test client...")
+    result['test_client'] = run_test_client(password, args.warmup, args.requests)
+    if args.gunicorn:
+        print("Running against gunicorn...")
+        result['gunicorn'] = run_gunicorn(password, args.warmup, args.requests, args.workers, args.concurrency)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(result, previous)
+
+    output = args.output or os.path.join(ROOT, 'build', 'benchmarks', f"{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\n✅ Results saved to {output}")
@@ -0,0 +1,128 @@
+"""
+Writes content-hashed copies of the static assets and a manifest mapping each
+original path to its copy:
+
+    static/js/main.js  ->  static/dist/js/main.3f2a9c1b7d4e.js
+    static/dist/manifest.json   {"js/main.js": "dist/js/main.3f2a9c1b7d4e.js", ...}
+
+app.py resolves url_for('static', filename=...) through the manifest, and files
+under static/dist/ are served with a one-year immutable Cache-Control. Copies
+from the previous build are kept so pages cached before a deploy still load.
+
+Text assets also get .gz and .br (when the brotli package is installed)
+siblings at maximum compression, which the static view serves according to
+Accept-Encoding.
+
+    python3 build_assets.py [--clean]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+STATIC_DIR = 'static'
+ASSET_DIRS = ['css', 'js', 'images']
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.txt', '.xml', '.html', '.ico'}
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def _load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _precompress(path):
+    """Write .gz/.br siblings of path, each only if it is smaller than the file itself."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    written = 0
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            _write_atomic(path + suffix, compressed)
+            written += 1
+    return written
+
+
+def build(static_dir=STATIC_DIR, clean=False):
+    """Fingerprint every file under ASSET_DIRS. Returns a summary dict."""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    previous = {} if clean else _load_manifest(manifest_path)
+
+    manifest = {}
+    written = compressed = 0
+    for asset_dir in ASSET_DIRS:
+        for root, _, files in os.walk(os.path.join(static_dir, asset_dir)):
+            for name in sorted(files):
+                source = os.path.join(root, name)
+                relpath = os.path.relpath(source, static_dir).replace(os.sep, '/')
+                stem, ext = os.path.splitext(relpath)
+                hashed = f'{DIST_DIR}/{stem}.{_file_hash(source)}{ext}'
+                manifest[relpath] = hashed
+
+                target = os.path.join(static_dir, hashed)
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copyfile(source, f'{target}.tmp')
+                    os.replace(f'{target}.tmp', target)
+                    written += 1
+                    if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                        compressed += _precompress(target)
+
+    keep = set(manifest.values()) | set(previous.values()) | {f'{DIST_DIR}/{MANIFEST_NAME}'}
+    removed = 0
+    for root, _, files in os.walk(dist_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            relpath = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            if relpath.endswith(COMPRESSED_SUFFIXES):
+                relpath = relpath[:-3]
+            if relpath not in keep:
+                os.remove(path)
+                removed += 1
+
+    os.makedirs(dist_dir, exist_ok=True)
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return {'assets': len(manifest), 'written': written, 'compressed': compressed, 'removed': removed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fingerprint static assets for far-future caching.')
+    parser.add_argument('--clean', action='store_true', help='Also drop the copies kept from the previous build')
+    args = parser.parse_args()
+
+    summary = build(clean=args.clean)
+    print(f"✅ {summary['assets']} assets fingerprinted: {summary['written']} written "
+          f"({summary['compressed']} compressed copies), {summary['removed']} removed")
@@ -0,0 +1,282 @@
+"""
+Extracts, for each public page template, the CSS rules its above-the-fold markup
+needs: the <body>, the navigation and the first <section> of <main>.
+
+app.py inlines the result in a <style> tag and loads the full stylesheets
+asynchronously, so the hero paints without waiting for them. The output, and
+the cache, is build/critical.json:
+
+    {"index.html": {"hash": "...", "css": "..."}, ...}
+
+A template is re-rendered only when its source, base.html, macros.html or a
+stylesheet changed since the last run.
+
+    python3 build_critical_css.py [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from html.parser import HTMLParser
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+OUTPUT = os.path.join('build', 'critical.json')
+SHARED_TEMPLATES = ['base.html', 'macros.html']
+# Always present on the page, whatever the markup
+IMPLICIT_TAGS = {'html', 'body'}
+
+
+class AboveTheFold(HTMLParser):
+    """Collects tag names, classes and ids up to the end of the first <section> in <main>."""
+
+    def __init__(self):
+        super().__init__()
+        self.tags, self.classes, self.ids = set(IMPLICIT_TAGS), set(), set()
+        self._in_main = False
+        self._open_sections = 0
+        self._done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self._done:
+            return
+        self.tags.add(tag)
+        for name, value in attrs:
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+        if tag == 'main':
+            self._in_main = True
+        elif tag == 'section' and self._in_main:
+            self._open_sections += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'section' and self._in_main and not self._done:
+            self._open_sections -= 1
+            self._done = self._open_sections == 0
+
+
+def _read_block(css, start):
+    """Index just past the '}' closing the block whose '{' is at css[start - 1]."""
+    depth, i, quote = 1, start, None
+    while i < len(css):
+        char = css[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def parse_css(css):
+    """
+    Split a stylesheet into nodes: ('rule', selectors, body), ('group', prelude,
+    children) for @media/@supports/@layer, and ('raw', prelude, text) for other
+    at-rules such as @keyframes.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    nodes, i = [], 0
+    while i < len(css):
+        brace = css.find('{', i)
+        semicolon = css.find(';', i)
+        if brace == -1:
+            break
+        if css[i:].lstrip().startswith('@') and semicolon != -1 and semicolon < brace:
+            nodes.append(('raw', css[i:semicolon].strip(), css[i:semicolon + 1].strip()))
+            i = semicolon + 1
+            continue
+        prelude = css[i:brace].strip()
+        end = _read_block(css, brace + 1)
+        if prelude.startswith(('@media', '@supports', '@layer')):
+            nodes.append(('group', prelude, parse_css(css[brace + 1:end - 1])))
+        elif prelude.startswith('@'):
+            nodes.append(('raw', prelude, ' '.join(css[i:end].split())))
+        else:
+            nodes.append(('rule', prelude, ' '.join(css[brace + 1:end - 1].split())))
+        i = end
+    return nodes
+
+
+def _split_top_level(selectors):
+    parts, depth, current, escaped = [], 0, '', False
+    for char in selectors:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _read_name(selector, i):
+    """Read an identifier with CSS escapes from selector[i:], returning (name, end)."""
+    name = ''
+    while i < len(selector):
+        char = selector[i]
+        if char == '\\' and i + 1 < len(selector):
+            name += selector[i + 1]
+            i += 2
+            continue
+        if char in ' .#:[>+~,()*' or char in '\t\n':
+            break
+        name += char
+        i += 1
+    return name, i
+
+
+def selector_requirements(selector):
+    """(tags, classes, ids) a selector needs; pseudo-classes and attributes are ignored."""
+    tags, classes, ids = set(), set(), set()
+    i = 0
+    while i < len(selector):
+        char = selector[i]
+        if char == '.':
+            name, i = _read_name(selector, i + 1)
+            classes.add(name)
+        elif char == '#':
+            name, i = _read_name(selector, i + 1)
+            ids.add(name)
+        elif char == '[':
+            i = selector.find(']', i) + 1 or len(selector)
+        elif char == ':':
+            while i < len(selector) and selector[i] == ':':
+                i += 1
+            _, i = _read_name(selector, i)
+            if i < len(selector) and selector[i] == '(':
+                depth = 0
+                while i < len(selector):
+                    depth += {'(': 1, ')': -1}.get(selector[i], 0)
+                    i += 1
+                    if depth == 0:
+                        break
+        elif char.isalpha():
+            name, i = _read_name(selector, i)
+            tags.add(name.lower())
+        else:
+            i += 1
+    return tags, classes, ids
+
+
+def _matches(selectors, used):
+    tags, classes, ids = used
+    for selector in _split_top_level(selectors):
+        need_tags, need_classes, need_ids = selector_requirements(selector)
+        if need_tags <= tags and need_classes <= classes and need_ids <= ids:
+            return True
+    return False
+
+
+def select(nodes, used):
+    """Serialise the nodes needed by the used (tags, classes, ids), plus referenced @keyframes."""
+    keyframes = {}
+
+    def walk(nodes):
+        out = []
+        for kind, prelude, content in nodes:
+            if kind == 'rule' and _matches(prelude, used):
+                out.append(f'{prelude}{{{content}}}')
+            elif kind == 'group':
+                children = walk(content)
+                if children:
+                    out.append(f"{prelude}{{{''.join(children)}}}")
+            elif kind == 'raw' and prelude.startswith(('@keyframes', '@-webkit-keyframes')):
+                keyframes[prelude.split()[-1]] = content
+            elif kind == 'raw' and prelude.startswith('@charset'):
+                out.append(content)
+        return out
+
+    css = ''.join(walk(nodes))
+    animations = {name for name in keyframes if re.search(rf'animation(-name)?:[^;}}]*\b{re.escape(name)}\b', css)}
+    return css + ''.join(keyframes[name] for name in sorted(animations))
+
+
+def _stylesheets(app):
+    names = ([app.config['TAILWIND_CSS']] if app.config['TAILWIND_BUILT'] else []) + ['css/style.css']
+    return [os.path.join(app.static_folder, name) for name in names]
+
+
+def _source_hash(app, template, stylesheets):
+    digest = hashlib.sha256()
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    for path in [os.path.join(template_dir, name) for name in [template] + SHARED_TEMPLATES] + stylesheets:
+        digest.update(path.encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build(force=False):
+    """Refresh build/critical.json. Returns a summary dict."""
+    from app import app, db, PUBLIC_PAGES, render_page
+
+    output_path = os.path.join(ROOT, OUTPUT)
+    try:
+        with open(output_path) as f:
+            previous = {} if force else json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    result, extracted, cached = {}, 0, 0
+    with app.app_context():
+        lang = app.config['DEFAULT_LANGUAGE']
+        stylesheets = _stylesheets(app)
+        nodes = None
+        for slug, (url_path, template) in sorted(PUBLIC_PAGES.items()):
+            source_hash = _source_hash(app, template, stylesheets)
+            if previous.get(template, {}).get('hash') == source_hash:
+                result[template] = previous[template]
+                cached += 1
+                continue
+
+            if nodes is None:
+                nodes = []
+                for path in stylesheets:
+                    with open(path) as f:
+                        nodes.extend(parse_css(f.read()))
+            with app.test_request_context(f'/{lang}{url_path}'):
+                html = render_page(slug, template, lang)
+            parser = AboveTheFold()
+            parser.feed(html)
+            css = select(nodes, (parser.tags, parser.classes, parser.ids))
+            result[template] = {'hash': source_hash, 'css': css}
+            extracted += 1
+        db.session.remove()
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f'{output_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, output_path)
+    return {'templates': len(result), 'extracted': extracted, 'cached': cached,
+            'bytes': sum(len(entry['css']) for entry in result.values())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Extract above-the-fold CSS for each public page.')
+    parser.add_argument('--force', action='store_true', help='Ignore cached results')
+    args = parser.parse_args()
+
+    summary = build(force=args.force)
+    print(f"✅ Critical CSS for {summary['templates']} templates: {summary['extracted']} extracted, "
+          f"{summary['cached']} unchanged, {summary['bytes']} bytes in total")
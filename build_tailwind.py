@@ -0,0 +1,106 @@
+"""
+Compiles the Tailwind utilities used by the templates into static/css/tailwind.css,
+replacing the in-browser compiler from cdn.tailwindcss.com.
+
+The theme comes from the same static/js/*tailwind*.js files the CDN build reads,
+so colours and fonts stay defined in one place. Classes are collected from
+templates/**/*.html and static/js/*.js; the output is purged and minified.
+
+Requires the Tailwind v3 CLI, either the standalone binary (no Node.js, no
+network at build time) or an npm install. It is looked up in TAILWIND_BIN,
+then bin/tailwindcss, then node_modules/.bin/tailwindcss, then PATH.
+
+    python3 build_tailwind.py && python3 build_assets.py
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+THEME_FILES = ['static/js/tailwind-config.js', 'static/js/admin-tailwind.js']
+CONTENT = ['templates/**/*.html', 'static/js/**/*.js']
+OUTPUT = 'static/css/tailwind.css'
+
+INPUT_CSS = "@tailwind base;\n@tailwind components;\n@tailwind utilities;\n"
+
+# The theme files assign `tailwind.config = {...}` for the CDN script; collect
+# every assignment and merge their theme.extend sections.
+CONFIG_TEMPLATE = """\
+const configs = [];
+const tailwind = {{ set config(value) {{ configs.push(value); }} }};
+{theme_sources}
+const extend = {{}};
+for (const config of configs) {{
+    for (const [key, value] of Object.entries((config.theme || {{}}).extend || {{}})) {{
+        extend[key] = Object.assign(extend[key] || {{}}, value);
+    }}
+}}
+module.exports = {{ content: {content}, theme: {{ extend }} }};
+"""
+
+
+def find_cli():
+    candidates = [os.getenv('TAILWIND_BIN'),
+                  os.path.join(ROOT, 'bin', 'tailwindcss'),
+                  os.path.join(ROOT, 'node_modules', '.bin', 'tailwindcss'),
+                  shutil.which('tailwindcss')]
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+def write_config(directory):
+    sources = []
+    for path in THEME_FILES:
+        with open(os.path.join(ROOT, path)) as f:
+            sources.append(f'// {path}\n{f.read()}')
+    content = json.dumps([os.path.join(ROOT, pattern) for pattern in CONTENT])
+
+    config_path = os.path.join(directory, 'tailwind.config.js')
+    with open(config_path, 'w') as f:
+        f.write(CONFIG_TEMPLATE.format(theme_sources='\n'.join(sources), content=content))
+    input_path = os.path.join(directory, 'input.css')
+    with open(input_path, 'w') as f:
+        f.write(INPUT_CSS)
+    return config_path, input_path
+
+
+def build(cli=None, output=OUTPUT):
+    """Run the Tailwind CLI and return the size of the written stylesheet."""
+    cli = cli or find_cli()
+    if cli is None:
+        raise RuntimeError('Tailwind CLI not found; set TAILWIND_BIN or install the standalone binary in bin/')
+
+    output_path = os.path.join(ROOT, output)
+    tmp_output = f'{output_path}.tmp'
+    with tempfile.TemporaryDirectory() as directory:
+        config_path, input_path = write_config(directory)
+        subprocess.run([cli, '--config', config_path, '--input', input_path,
+                        '--output', tmp_output, '--minify'],
+                       cwd=ROOT, check=True)
+    os.replace(tmp_output, output_path)
+    return os.path.getsize(output_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the purged Tailwind stylesheet.')
+    parser.add_argument('--cli', help='Path to the tailwindcss executable')
+    parser.add_argument('--print-config', action='store_true', help='Print the generated Tailwind config and exit')
+    args = parser.parse_args()
+
+    if args.print_config:
+        with tempfile.TemporaryDirectory() as directory:
+            with open(write_config(directory)[0]) as f:
+                print(f.read())
+    else:
+        try:
+            size = build(cli=args.cli)
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"❌ Tailwind build failed: {e}")
+            raise SystemExit(1)
+        print(f"✅ {OUTPUT} written ({size // 1024} KB)")
@@ -151,6 +151,11 @@ EOF
 
 echo ""
 echo "[7/8] Initializing database schema and content..."
+if ! python3 init_db.py migrate; then
+    echo "❌ Error applying database migrations"
+    exit 1
+fi
+python3 init_db.py status
 if python3 init_db.py; then
     echo "✓ Database initialized successfully"
     echo ""
@@ -167,6 +172,39 @@ else
     exit 1
 fi
 
+echo "Building Tailwind stylesheet..."
+if python3 build_tailwind.py; then
+    echo "✓ Tailwind stylesheet built"
+else
+    echo "⚠️  Tailwind CLI unavailable; pages keep using the Tailwind CDN script"
+fi
+
+echo "Extracting critical CSS..."
+if python3 build_critical_css.py; then
+    echo "✓ Critical CSS extracted"
+else
+    echo "⚠️  Critical CSS extraction failed; pages load their stylesheets normally"
+    rm -f build/critical.json
+fi
+
+echo "Fingerprinting static assets..."
+if python3 build_assets.py; then
+    echo "✓ Static assets fingerprinted"
+else
+    echo "❌ Error building static assets"
+    exit 1
+fi
+
+echo "Building responsive image derivatives..."
+if python3 image_derivatives.py backfill; then
+    echo "✓ Image derivatives up to date"
+else
+    echo "⚠️  Some image derivatives could not be built; the original images are served instead"
+fi
+
+# Per-worker metric files of the previous release; the new workers start from zero
+rm -rf "${METRICS_DIR:-/tmp/bellari-metrics}"
+
 echo ""
 echo "[8/8] Setting up log directory..."
 if [ ! -d "$LOG_DIR" ]; then
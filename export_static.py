@@ -0,0 +1,234 @@
+"""
+Pre-renders the public site into a directory nginx can serve without gunicorn.
+
+Layout of the output directory:
+    fr/index.html, en/about/index.html, ...  every page in every language
+    index.html, about/index.html, ...        redirect stubs to the /<lang>/ page
+    errors/404.html, en/errors/404.html, ...
+    sitemap.xml (+ sitemap-<n>.xml), robots.txt, manifest.json, sw.js
+    favicon.ico, apple-touch-icon.png, icons/icon-<size>.png
+    .export-manifest.json                    content hashes of the last export
+
+As in the app, /<lang>/... is the only canonical URL of a page. An unprefixed
+URL gets a stub that sends the browser to the language it prefers, or to
+DEFAULT_LANGUAGE, like redirect_to_language() does with Accept-Language.
+
+Only pages whose content hash changed since the last export are re-rendered.
+A minimal nginx setup serves /static/ from the project and everything else
+with `try_files $uri $uri/index.html @gunicorn;`.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import threading
+import time
+
+MANIFEST_NAME = '.export-manifest.json'
+
+_export_lock = threading.Lock()
+
+
+def _hash(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _page_path(url_path, lang=None):
+    """'/about' -> 'about/index.html', prefixed with the language directory if given."""
+    parts = [lang] if lang else []
+    parts += [p for p in url_path.strip('/').split('/') if p]
+    parts.append('index.html')
+    return os.path.join(*parts)
+
+
+def _redirect_stub(base_url, targets, default_lang):
+    """HTML sending an unprefixed URL to targets[lang], chosen from navigator.languages."""
+    default = html.escape(targets[default_lang])
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="robots" content="noindex">
+<link rel="canonical" href="{html.escape(base_url)}{default}">
+<script>
+(function () {{
+    var targets = {json.dumps(targets)};
+    var preferred = (navigator.languages || [navigator.language || '']).map(function (tag) {{
+        return tag.slice(0, 2).toLowerCase();
+    }}).filter(function (lang) {{ return targets.hasOwnProperty(lang); }})[0];
+    location.replace((targets[preferred] || targets[{json.dumps(default_lang)}]) + location.search);
+}})();
+</script>
+<meta http-equiv="refresh" content="0; url={default}">
+</head>
+<body><a href="{default}">{default}</a></body>
+</html>
+""".encode('utf-8')
+
+
+def _write_atomic(output_dir, relpath, data):
+    path = os.path.join(output_dir, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def export_site(output_dir=None, base_url=None, force=False):
+    """
+    Render every active page in every language, plus the sitemap, robots.txt,
+    manifest and error pages. Returns a summary dict.
+    """
+    from flask import g, make_response
+    from app import (app, db, Page, Section, PUBLIC_PAGES, ERROR_TEMPLATES, IMAGES_SCOPE,
+                     localized_path, render_page, settings_snapshot, content_versions, site_icons,
+                     _build_sitemap, sitemap_part_count, _build_robots, _build_manifest, service_worker)
+
+    started = time.perf_counter()
+    with app.app_context():
+        output_dir = output_dir or app.config['STATIC_EXPORT_DIR']
+        base_url = (base_url or app.config['SITE_URL']).rstrip('/')
+        # Read by site_root() in every request context below, which share this app context
+        g.site_root = base_url
+        languages = app.config['LANGUAGES']
+        default_lang = app.config['DEFAULT_LANGUAGE']
+
+        previous = {} if force else _load_manifest(output_dir).get('files', {})
+        settings = dict(settings_snapshot.current())
+        release = app.config['RELEASE_VERSION']
+        images_version = content_versions.current().get(IMAGES_SCOPE, 0)
+
+        pages = [page for page in Page.query.filter_by(is_active=True).all() if page.slug in PUBLIC_PAGES]
+        sections = {}
+        for section in Section.query.filter_by(is_active=True).order_by(Section.order_index, Section.id).all():
+            sections.setdefault((section.page_id, section.language_code), []).append(
+                [section.id, section.section_type, section.order_index, section.heading, section.subheading,
+                 section.content, section.button_text, section.button_link, section.image_url,
+                 section.background_image, section.background_color]
+            )
+
+        files = {}
+        rendered = skipped = 0
+
+        def emit(relpath, content_hash, build):
+            nonlocal rendered, skipped
+            files[relpath] = content_hash
+            if previous.get(relpath) == content_hash and os.path.exists(os.path.join(output_dir, relpath)):
+                skipped += 1
+                return
+            _write_atomic(output_dir, relpath, build())
+            rendered += 1
+
+        for page in pages:
+            url_path, template = PUBLIC_PAGES[page.slug]
+            for lang in languages:
+                content_hash = _hash(release, base_url, settings, images_version,
+                                     [page.slug, page.title, page.meta_description],
+                                     sections.get((page.id, lang), []))
+
+                def build(slug=page.slug, template=template, lang=lang, path=localized_path(url_path, lang)):
+                    with app.test_request_context(path, base_url=base_url):
+                        return render_page(slug, template, lang).encode('utf-8')
+
+                emit(_page_path(url_path, lang), content_hash, build)
+
+            targets = {lang: localized_path(url_path, lang) for lang in languages}
+            emit(_page_path(url_path), _hash('redirect', base_url, targets, default_lang),
+                 lambda targets=targets: _redirect_stub(base_url, targets, default_lang))
+
+        site_hash = _hash(release, base_url, settings)
+        for code, template in ERROR_TEMPLATES.items():
+            for lang in languages:
+                def build(code=code, template=template, lang=lang):
+                    from flask import render_template
+                    with app.test_request_context(f'/{lang}/errors/{code}.html', base_url=base_url):
+                        return render_template(template, lang=lang).encode('utf-8')
+
+                emit(os.path.join(lang, 'errors', f'{code}.html'), site_hash, build)
+                if lang == default_lang:
+                    emit(os.path.join('errors', f'{code}.html'), site_hash, build)
+
+        def build_response(view, *args):
+            with app.test_request_context('/', base_url=base_url):
+                return make_response(view(*args)).get_data()
+
+        # lastmod also follows section writes, through the content versions
+        pages_hash = _hash(site_hash, [[p.slug, p.updated_at] for p in pages], sorted(content_versions.current().items()))
+        emit('sitemap.xml', pages_hash, lambda: build_response(_build_sitemap))
+        with app.test_request_context('/', base_url=base_url):
+            sitemap_parts = sitemap_part_count()
+        for part in range(1, sitemap_parts + 1):
+            emit(f'sitemap-{part}.xml', pages_hash, lambda part=part: build_response(_build_sitemap, part))
+        emit('robots.txt', site_hash, lambda: build_response(_build_robots))
+        emit('sw.js', _hash(site_hash, sorted(content_versions.current().items())),
+             lambda: build_response(service_worker))
+        for name, icon in site_icons.current().items():
+            relpath = name if name in ('favicon.ico', 'apple-touch-icon.png') else os.path.join('icons', name)
+            emit(relpath, icon.etag, lambda data=icon.data: data)
+        if settings.get('pwa_enabled', 'false') == 'true':
+            emit('manifest.json', site_hash, lambda: build_response(_build_manifest, settings, default_lang))
+
+        removed = 0
+        for relpath in set(previous) - set(files):
+            try:
+                os.remove(os.path.join(output_dir, relpath))
+                removed += 1
+            except OSError:
+                pass
+
+        _write_atomic(output_dir, MANIFEST_NAME, json.dumps(
+            {'release': release, 'exported_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), 'files': files},
+            indent=2, sort_keys=True
+        ).encode('utf-8'))
+        db.session.remove()
+
+    return {
+        'output_dir': output_dir,
+        'rendered': rendered,
+        'skipped': skipped,
+        'removed': removed,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def start_export(**kwargs):
+    """Run export_site() in a background thread. Returns False if one is already running."""
+    if not _export_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            print(f"Static export finished: {export_site(**kwargs)}")
+        except Exception as e:
+            print(f"❌ Static export failed: {e}")
+        finally:
+            _export_lock.release()
+
+    threading.Thread(target=run, name='static-export', daemon=True).start()
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export the public site as static files.')
+    parser.add_argument('--output', help='Output directory (default: STATIC_EXPORT_DIR)')
+    parser.add_argument('--base-url', help='Public site URL used in absolute links (default: SITE_URL)')
+    parser.add_argument('--force', action='store_true', help='Re-render every file, ignoring the previous export')
+    args = parser.parse_args()
+
+    summary = export_site(output_dir=args.output, base_url=args.base_url, force=args.force)
+    print(f"✅ Exported to {summary['output_dir']}: {summary['rendered']} written, "
+          f"{summary['skipped']} unchanged, {summary['removed']} removed in {summary['seconds']}s")
@@ -0,0 +1,184 @@
+"""
+Resized WebP (and AVIF, when Pillow can encode it) copies of site images.
+
+Each source image, an upload or a bundled static/images file, gets one file
+per format and width in DERIVATIVES_FOLDER, recorded in the image_derivative
+table. Templates pick them up through responsive_image() as <picture> sources.
+
+Uploads are processed on a small thread pool so the admin request returns
+immediately; existing images are processed with:
+
+    python3 image_derivatives.py backfill [--force] [--uploads-only]
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image as PILImage, ImageOps
+
+BUNDLED_IMAGES_DIR = 'images'
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+QUALITY = {'webp': 80, 'avif': 60}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def available_formats():
+    PILImage.init()
+    return [fmt for fmt in ('avif', 'webp') if fmt.upper() in PILImage.SAVE]
+
+
+def _derivative_name(source, width, fmt):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    digest = hashlib.sha1(source.encode()).hexdigest()[:8]
+    return f'{stem}-{digest}-{width}.{fmt}'
+
+
+def render_derivatives(source_path, output_dir, source, widths, formats):
+    """
+    Write one file per (format, width) for the image at source_path and return
+    their (format, width, height, filename, size) tuples. Widths at or above the
+    original are skipped, but the original width is always produced once.
+    """
+    written = []
+    with PILImage.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        targets = sorted({w for w in widths if w < img.width} | {min(img.width, max(widths))})
+        for width in targets:
+            height = round(img.height * width / img.width)
+            resized = img if width == img.width else img.resize((width, height), PILImage.LANCZOS)
+            for fmt in formats:
+                name = _derivative_name(source, width, fmt)
+                path = os.path.join(output_dir, name)
+                tmp_path = f'{path}.tmp'
+                resized.save(tmp_path, format=fmt.upper(), quality=QUALITY[fmt])
+                os.replace(tmp_path, path)
+                written.append((fmt, width, height, name, os.path.getsize(path)))
+    return written
+
+
+def generate(source, image_id=None):
+    """
+    (Re)build the derivatives of one source, given relative to the static folder.
+    Must run inside an app context. Returns the number of files written.
+    """
+    from app import app, db, ImageDerivative, IMAGES_SCOPE, bump_content_version
+
+    static_folder = app.static_folder
+    output_dir = app.config['DERIVATIVES_FOLDER']
+    derived_prefix = os.path.relpath(output_dir, static_folder)
+
+    widths = app.config['DERIVATIVE_WIDTHS']
+    if image_id is not None:
+        # Uploads also get the admin image library thumbnail
+        widths = widths + [app.config['THUMBNAIL_WIDTH']]
+    written = render_derivatives(os.path.join(static_folder, source), output_dir, source,
+                                 widths, available_formats())
+    remove(source, keep={f'{derived_prefix}/{name}' for _, _, _, name, _ in written})
+    # Old rows share (source, format, width) with the new ones; delete them first
+    db.session.flush()
+    for fmt, width, height, name, size in written:
+        db.session.add(ImageDerivative(
+            image_id=image_id,
+            source=source,
+            filename=f'{derived_prefix}/{name}',
+            format=fmt,
+            width=width,
+            height=height,
+            file_size=size
+        ))
+    bump_content_version(IMAGES_SCOPE)
+    db.session.commit()
+    return len(written)
+
+
+def remove(source, keep=()):
+    """
+    Delete the derivative rows of a source, and their files except those in keep
+    (just rewritten under the same name). The caller commits.
+    """
+    from app import app, db, ImageDerivative
+
+    for derivative in ImageDerivative.query.filter_by(source=source).all():
+        path = os.path.join(app.static_folder, derivative.filename)
+        if derivative.filename not in keep and os.path.exists(path):
+            os.remove(path)
+        db.session.delete(derivative)
+
+
+def _run(source, image_id):
+    from app import app, db
+
+    with app.app_context():
+        try:
+            generate(source, image_id)
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Image derivatives failed for {source}: {e}")
+        finally:
+            db.session.remove()
+
+
+def submit(source, image_id=None):
+    """Queue generate() on the worker pool, off the request thread."""
+    global _executor
+    from app import app
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'],
+                                           thread_name_prefix='image-derivatives')
+    return _executor.submit(_run, source, image_id)
+
+
+def backfill(force=False, uploads_only=False):
+    """Process uploads and bundled images that have no derivatives yet. Returns a summary dict."""
+    from app import app, db, Image, ImageDerivative
+
+    processed = skipped = failed = 0
+    with app.app_context():
+        upload_prefix = os.path.relpath(app.config['UPLOAD_FOLDER'], app.static_folder)
+        sources = [(f'{upload_prefix}/{image.filename}', image.id) for image in Image.query.all()]
+        if not uploads_only:
+            bundled_dir = os.path.join(app.static_folder, BUNDLED_IMAGES_DIR)
+            for name in sorted(os.listdir(bundled_dir)):
+                if os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS:
+                    sources.append((f'{BUNDLED_IMAGES_DIR}/{name}', None))
+
+        done = {source for (source,) in db.session.query(ImageDerivative.source).distinct()}
+        for source, image_id in sources:
+            if not force and source in done:
+                skipped += 1
+                continue
+            if not os.path.exists(os.path.join(app.static_folder, source)):
+                print(f"⚠️  Missing file for {source}, skipped")
+                failed += 1
+                continue
+            try:
+                count = generate(source, image_id)
+                print(f"✅ {source}: {count} derivatives")
+                processed += 1
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ {source}: {e}")
+                failed += 1
+        db.session.remove()
+
+    return {'processed': processed, 'skipped': skipped, 'failed': failed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build responsive image derivatives.')
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--force', action='store_true', help='Rebuild images that already have derivatives')
+    parser.add_argument('--uploads-only', action='store_true', help='Skip the bundled static/images files')
+    args = parser.parse_args()
+
+    summary = backfill(force=args.force, uploads_only=args.uploads_only)
+    print(f"Derivatives: {summary['processed']} processed, {summary['skipped']} already done, "
+          f"{summary['failed']} failed")
@@ -1,101 +1,244 @@
+import argparse
+import hashlib
 import os
 import shutil
+from datetime import datetime
 from sqlalchemy import text, inspect
 from werkzeug.security import generate_password_hash
 from PIL import Image
 
+def _add_missing_columns(db, table, columns):
+    """Add each (name, SQL type) in columns that the existing table lacks."""
+    inspector = inspect(db.engine)
+    if table not in inspector.get_table_names():
+        return
+    # inspector.get_columns returns a list of dicts with 'name', 'type', etc.
+    existing_columns = [c['name'] for c in inspector.get_columns(table)]
+    for col_name, col_type in columns:
+        if col_name not in existing_columns:
+            print(f"⚠️  Column '{col_name}' missing in table '{table}'. Adding...")
+            try:
+                # For SQLite, ALTER TABLE ADD COLUMN is limited but works for simple types in newer versions.
+                # For Postgres, standard syntax works.
+                stmt = f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}"
+
+                # Execute raw SQL
+                with db.engine.connect() as conn:
+                    conn.execute(text(stmt))
+                    conn.commit()
+
+                print(f"✅ Column '{col_name}' added to '{table}'.")
+            except Exception as e:
+                print(f"❌ Failed to add column '{col_name}' to '{table}': {e}")
+
+def _create_index(db, index_name, table, columns, unique=False):
+    # create_all only builds indexes for tables it creates
+    stmt = f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(columns)})"
+    with db.engine.connect() as conn:
+        conn.execute(text(stmt))
+        conn.commit()
+    print(f"✅ Index '{index_name}' checked/created.")
+
+def _migrate_base_tables(db):
+    db.create_all()
+    print("✅ Tables checked/created.")
+
+    # Define critical columns to check. Format: Table -> [(Column, Type)]
+    schema_checks = {
+        'user': [
+            ('username', 'VARCHAR(80)'),
+            ('password_hash', 'VARCHAR(255)'),
+            ('created_at', 'TIMESTAMP')
+        ],
+        'page': [
+            ('slug', 'VARCHAR(100)'),
+            ('title', 'VARCHAR(200)'),
+            ('meta_description', 'VARCHAR(300)'),
+            ('is_active', 'BOOLEAN'),
+            ('created_at', 'TIMESTAMP'),
+            ('updated_at', 'TIMESTAMP')
+        ],
+        'section': [
+            ('page_id', 'INTEGER'),
+            ('section_type', 'VARCHAR(50)'),
+            ('language_code', 'VARCHAR(5)'),
+            ('order_index', 'INTEGER'),
+            ('heading', 'VARCHAR(300)'),
+            ('subheading', 'VARCHAR(300)'),
+            ('content', 'TEXT'),
+            ('button_text', 'VARCHAR(100)'),
+            ('button_link', 'VARCHAR(200)'),
+            ('image_url', 'VARCHAR(300)'),
+            ('background_image', 'VARCHAR(300)'),
+            ('background_color', 'VARCHAR(20)'),
+            ('is_active', 'BOOLEAN'),
+            ('created_at', 'TIMESTAMP')
+        ],
+        'image': [
+            ('filename', 'VARCHAR(300)'),
+            ('original_filename', 'VARCHAR(300)'),
+            ('alt_text', 'VARCHAR(200)'),
+            ('file_size', 'INTEGER'),
+            ('width', 'INTEGER'),
+            ('height', 'INTEGER'),
+            ('uploaded_at', 'TIMESTAMP')
+        ],
+        'site_settings': [
+            ('key', 'VARCHAR(100)'),
+            ('value', 'TEXT'),
+            ('description', 'VARCHAR(300)'),
+            ('updated_at', 'TIMESTAMP')
+        ]
+    }
+
+    # Handling for PostgreSQL (VPS) vs SQLite (Dev)
+    for table, columns in schema_checks.items():
+        _add_missing_columns(db, table, columns)
+
+def _migrate_section_index(db):
+    _create_index(db, 'ix_section_page_lang_active_order', 'section',
+                  ['page_id', 'language_code', 'is_active', 'order_index'])
+
+def _migrate_image_derivatives(db):
+    from app import ImageDerivative
+    ImageDerivative.__table__.create(db.engine, checkfirst=True)
+    print("✅ Table 'image_derivative' checked/created.")
+
+def _migrate_image_content_hash(db):
+    from app import app, Image
+
+    _add_missing_columns(db, 'image', [('content_hash', 'VARCHAR(64)')])
+    # Legacy uploads keep their names; only the first copy of a duplicate gets the hash
+    seen = {row[0] for row in db.session.query(Image.content_hash).filter(Image.content_hash.isnot(None))}
+    for image in Image.query.filter(Image.content_hash.is_(None)).order_by(Image.id).all():
+        path = os.path.join(app.config['UPLOAD_FOLDER'], image.filename)
+        if not os.path.exists(path):
+            continue
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(app.config['UPLOAD_CHUNK_SIZE']), b''):
+                digest.update(chunk)
+        if digest.hexdigest() not in seen:
+            image.content_hash = digest.hexdigest()
+            seen.add(image.content_hash)
+    db.session.commit()
+    _create_index(db, 'ix_image_content_hash', 'image', ['content_hash'], unique=True)
+
+def _migrate_section_translation_group(db):
+    from app import assign_translation_groups
+
+    _add_missing_columns(db, 'section', [('translation_group_id', 'VARCHAR(32)')])
+    _create_index(db, 'ix_section_translation_group_id', 'section', ['translation_group_id'])
+    print(f"✅ {assign_translation_groups()} sections assigned a translation group.")
+    db.session.commit()
+
+def _migrate_image_library_indexes(db):
+    # Keyset pagination skips rows whose sort key is NULL
+    with db.engine.connect() as conn:
+        conn.execute(text("UPDATE image SET uploaded_at = CURRENT_TIMESTAMP WHERE uploaded_at IS NULL"))
+        conn.commit()
+    _create_index(db, 'ix_image_uploaded_at_id', 'image', ['uploaded_at', 'id'])
+    if db.engine.dialect.name != 'postgresql':
+        return
+    # Same expression as app.image_search_text; LIKE '%term%' can use a trigram index
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_image_search_trgm ON image "
+                "USING gin ((lower(original_filename || ' ' || coalesce(alt_text, ''))) gin_trgm_ops)"
+            ))
+            conn.commit()
+        print("✅ Index 'ix_image_search_trgm' checked/created.")
+    except Exception as e:
+        print(f"⚠️  Trigram index on image not created, search will scan the table: {e}")
+
+def _migrate_legacy_favicon_setting(db):
+    from app import SiteSettings, SETTINGS_SCOPE, bump_content_version
+
+    # Formerly fixed up by init_settings() on every boot
+    updated = SiteSettings.query.filter_by(key='site_favicon', value='/static/logo.png').update(
+        {SiteSettings.value: '/static/favicon.png', SiteSettings.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    if updated:
+        print("Updated legacy favicon setting: site_favicon = /static/favicon.png")
+        bump_content_version(SETTINGS_SCOPE)
+    db.session.commit()
+
+# Ordered schema migrations: (version, description, function). Every function
+# must be idempotent; append new entries, never renumber or edit applied ones.
+MIGRATIONS = [
+    (1, 'Base tables and legacy column backfill', _migrate_base_tables),
+    (2, 'Composite index on section (page_id, language_code, is_active, order_index)', _migrate_section_index),
+    (3, 'image_derivative table for responsive WebP/AVIF copies', _migrate_image_derivatives),
+    (4, 'Unique SHA-256 content_hash on image, backfilled from the stored files', _migrate_image_content_hash),
+    (5, 'translation_group_id on section, pairing existing language versions', _migrate_section_translation_group),
+    (6, 'Image library indexes: (uploaded_at, id) and trigram search on PostgreSQL', _migrate_image_library_indexes),
+    (7, 'Point the legacy site_favicon setting at favicon.png instead of the logo', _migrate_legacy_favicon_setting),
+]
+
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version():
+    """Highest applied migration, or None when the schema_version table is missing."""
+    from app import db
+
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    except Exception:
+        return None
+
+def schema_is_current():
+    """Single-query check used at worker boot to skip all schema reflection."""
+    return get_schema_version() == LATEST_SCHEMA_VERSION
+
 def check_and_migrate_schema():
     """
-    Checks the database schema and applies migrations if necessary.
-    This is a manual migration system to ensure robustness on VPS.
+    Applies pending migrations from MIGRATIONS and records each one in the
+    schema_version table. This is a manual migration system to ensure robustness on VPS.
     """
     from app import app, db
 
     print("Checking database schema...")
     with app.app_context():
-        inspector = inspect(db.engine)
-        existing_tables = inspector.get_table_names()
-
-        # 1. Ensure Tables Exist
-        db.create_all()
-        print("✅ Tables checked/created.")
-
-        # 2. Check Columns (Manual Migration Logic)
-        # Define critical columns to check. Format: Table -> [(Column, Type)]
-        schema_checks = {
-            'user': [
-                ('username', 'VARCHAR(80)'),
-                ('password_hash', 'VARCHAR(255)'),
-                ('created_at', 'TIMESTAMP')
-            ],
-            'page': [
-                ('slug', 'VARCHAR(100)'),
-                ('title', 'VARCHAR(200)'),
-                ('meta_description', 'VARCHAR(300)'),
-                ('is_active', 'BOOLEAN'),
-                ('created_at', 'TIMESTAMP'),
-                ('updated_at', 'TIMESTAMP')
-            ],
-            'section': [
-                ('page_id', 'INTEGER'),
-                ('section_type', 'VARCHAR(50)'),
-                ('language_code', 'VARCHAR(5)'),
-                ('order_index', 'INTEGER'),
-                ('heading', 'VARCHAR(300)'),
-                ('subheading', 'VARCHAR(300)'),
-                ('content', 'TEXT'),
-                ('button_text', 'VARCHAR(100)'),
-                ('button_link', 'VARCHAR(200)'),
-                ('image_url', 'VARCHAR(300)'),
-                ('background_image', 'VARCHAR(300)'),
-                ('background_color', 'VARCHAR(20)'),
-                ('is_active', 'BOOLEAN'),
-                ('created_at', 'TIMESTAMP')
-            ],
-            'image': [
-                ('filename', 'VARCHAR(300)'),
-                ('original_filename', 'VARCHAR(300)'),
-                ('alt_text', 'VARCHAR(200)'),
-                ('file_size', 'INTEGER'),
-                ('width', 'INTEGER'),
-                ('height', 'INTEGER'),
-                ('uploaded_at', 'TIMESTAMP')
-            ],
-            'site_settings': [
-                ('key', 'VARCHAR(100)'),
-                ('value', 'TEXT'),
-                ('description', 'VARCHAR(300)'),
-                ('updated_at', 'TIMESTAMP')
-            ]
-        }
+        with db.engine.connect() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_version ("
+                "version INTEGER PRIMARY KEY, "
+                "description VARCHAR(200), "
+                "applied_at TIMESTAMP)"
+            ))
+            conn.commit()
+
+        current = get_schema_version() or 0
+        pending = [m for m in MIGRATIONS if m[0] > current]
+        if not pending:
+            print(f"✅ Schema up to date (version {current}).")
+            return
 
-        # Handling for PostgreSQL (VPS) vs SQLite (Dev)
-        for table, columns in schema_checks.items():
-            if table in existing_tables:
-                # inspector.get_columns returns a list of dicts with 'name', 'type', etc.
-                existing_columns = [c['name'] for c in inspector.get_columns(table)]
-                for col_name, col_type in columns:
-                    if col_name not in existing_columns:
-                        print(f"⚠️  Column '{col_name}' missing in table '{table}'. Adding...")
-                        try:
-                            # For SQLite, ALTER TABLE ADD COLUMN is limited but works for simple types in newer versions.
-                            # For Postgres, standard syntax works.
-                            stmt = f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}"
-
-                            # Execute raw SQL
-                            with db.engine.connect() as conn:
-                                conn.execute(text(stmt))
-                                conn.commit()
-
-                            print(f"✅ Column '{col_name}' added to '{table}'.")
-                        except Exception as e:
-                            print(f"❌ Failed to add column '{col_name}' to '{table}': {e}")
+        for version, description, migrate in pending:
+            print(f"🔧 Applying migration {version}: {description}")
+            migrate(db)
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(
+                        text("INSERT INTO schema_version (version, description, applied_at) "
+                             "VALUES (:version, :description, :applied_at)"),
+                        {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+                    )
+                    conn.commit()
+            except Exception:
+                # Another worker recorded it first; migrations are idempotent
+                pass
+        print(f"✅ Schema migrated to version {LATEST_SCHEMA_VERSION}.")
 
 def init_settings():
     """
     Initialize Site settings (including PWA and Favicon) in SiteSettings table if they don't exist.
     """
-    from app import app, db, SiteSettings
+    from app import app, db, save_settings
 
     print("Checking Site settings...")
     with app.app_context():
@@ -128,33 +271,17 @@ def init_settings():
             'consultation_url': 'https://tidycal.com/moamyoneart/consultation-gratuite-15-min'
         }
 
-        changes_made = False
-        for key, value in defaults.items():
-            setting = SiteSettings.query.filter_by(key=key).first()
-            if not setting:
-                print(f"Adding default setting: {key} = {value}")
-                db.session.add(SiteSettings(key=key, value=value))
-                changes_made = True
-            elif key == 'site_favicon':
-                # Update legacy favicon setting if it points to logo.png
-                if setting.value == '/static/logo.png':
-                     print(f"Updating legacy favicon setting: {key} = {value}")
-                     setting.value = value
-                     changes_made = True
-            else:
-                pass # Setting exists
-
-        if changes_made:
-            db.session.commit()
-            print("Site settings initialized.")
-        else:
-            print("Site settings up to date.")
+        added = save_settings(defaults, only_missing=True)
+        db.session.commit()
+        for key in added:
+            print(f"Adding default setting: {key} = {defaults[key]}")
+        print("Site settings initialized." if added else "Site settings up to date.")
 
 def init_content():
     """
     Auto-initializes the database with default content if it's empty.
     """
-    from app import app, db, User, Page, Section
+    from app import app, db, User, Page, Section, assign_translation_groups
 
     print("Checking default content...")
     with app.app_context():
@@ -344,6 +471,8 @@ def init_content():
                         db.session.add(section)
                     db.session.commit()
 
+                assign_translation_groups()
+                db.session.commit()
                 print("✅ Default content initialized.")
             else:
                 print("Default content already exists.")
@@ -376,6 +505,17 @@ def init_content():
             print(f"❌ Error during content initialization: {e}")
 
 if __name__ == "__main__":
-    check_and_migrate_schema()
-    init_settings()
-    init_content()
+    parser = argparse.ArgumentParser(description='Migrate and seed the Bellari Concept database.')
+    parser.add_argument('command', nargs='?', default='all', choices=['all', 'migrate', 'status'],
+                        help="'migrate' only applies schema migrations, 'status' prints the schema version")
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        from app import app
+        with app.app_context():
+            print(f"Schema version: {get_schema_version()} (latest: {LATEST_SCHEMA_VERSION})")
+    else:
+        check_and_migrate_schema()
+        if args.command == 'all':
+            init_settings()
+            init_content()
@@ -0,0 +1,239 @@
+"""
+Request, SQL and template metrics in the Prometheus text format.
+
+Each gunicorn worker keeps its own counters and histograms in memory and
+writes them to METRICS_DIR/<pid>.json at most every METRICS_FLUSH_INTERVAL
+seconds. The worker answering /admin/metrics flushes its own file, then adds
+up the files of every worker. Files of workers that have exited are kept, so
+counters never go backwards while the directory lives; their gauges are
+dropped. deploy.sh clears the directory on each release.
+
+Recorded per request, labelled by Flask endpoint (never by path, which would
+let any URL create a series):
+
+    bellari_http_requests_total                 method, status
+    bellari_http_request_duration_seconds       histogram
+    bellari_http_response_size_bytes            histogram, as sent (compressed)
+    bellari_sql_queries_per_request             histogram
+    bellari_sql_queries_total, bellari_sql_duration_seconds_total
+    bellari_template_render_duration_seconds    histogram, by template
+
+The SQL figures come from the request's query_budgets.QueryLog, which owns the
+Engine listener; query_budgets.init_app() must run too.
+"""
+
+import json
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request, before_render_template, template_rendered
+
+PREFIX = 'bellari_'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name -> (type, help, buckets)
+DEFINITIONS = {
+    'http_requests_total': ('counter', 'Requests handled, by endpoint, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'Time from before_request to after_request.', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size as sent.', SIZE_BUCKETS),
+    'sql_queries_per_request': ('histogram', 'SQL statements executed while handling one request.', QUERY_COUNT_BUCKETS),
+    'sql_queries_total': ('counter', 'SQL statements executed in requests.', None),
+    'sql_duration_seconds_total': ('counter', 'Time spent executing SQL in requests.', None),
+    'template_render_duration_seconds': ('histogram', 'Jinja template render time.', LATENCY_BUCKETS),
+    'page_cache_hits_total': ('counter', 'Rendered page cache hits.', None),
+    'page_cache_stale_hits_total': ('counter', 'Stale copies served while another thread re-rendered.', None),
+    'page_cache_misses_total': ('counter', 'Rendered page cache misses.', None),
+    'page_cache_entries': ('gauge', 'Pages held in the rendered page cache.', None),
+    'db_pool_size': ('gauge', 'Connections the pool keeps open.', None),
+    'db_pool_checked_out': ('gauge', 'Connections currently in use.', None),
+    'db_pool_overflow': ('gauge', 'Connections opened beyond the pool size.', None),
+}
+
+
+class Registry:
+    """Thread-safe counters and histograms of one worker, keyed by (name, sorted label items)."""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = DEFINITIONS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, labels, list(h[0]), h[1], h[2]] for (name, labels), h in self._histograms.items()],
+            }
+
+
+class Metrics:
+    def __init__(self):
+        self.registry = Registry()
+        self.app = None
+        self._collectors = []
+        self._flushed_at = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        if not app.config['METRICS_ENABLED']:
+            return
+        os.makedirs(app.config['METRICS_DIR'], exist_ok=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+    def collector(self, function):
+        """Register function() -> {name: value}, read at every flush: counters as running totals, and gauges."""
+        self._collectors.append(function)
+        return function
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_renders = []
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        self.registry.inc('http_requests_total', {'endpoint': endpoint, 'method': request.method,
+                                                  'status': str(response.status_code)})
+        self.registry.observe('http_request_duration_seconds', {'endpoint': endpoint},
+                              time.perf_counter() - started)
+        if not response.is_streamed and response.content_length is not None:
+            self.registry.observe('http_response_size_bytes', {'endpoint': endpoint}, response.content_length)
+        log = g.get('query_log')
+        if log is not None:
+            self.registry.observe('sql_queries_per_request', {'endpoint': endpoint}, log.total)
+            if log.total:
+                self.registry.inc('sql_queries_total', {'endpoint': endpoint}, log.total)
+                self.registry.inc('sql_duration_seconds_total', {'endpoint': endpoint}, log.seconds)
+        if time.monotonic() - self._flushed_at >= self.app.config['METRICS_FLUSH_INTERVAL']:
+            self.flush()
+        return response
+
+    def _before_render(self, sender, template, context, **extra):
+        if has_request_context() and 'metrics_renders' in g:
+            g.metrics_renders.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if has_request_context() and g.get('metrics_renders'):
+            self.registry.observe('template_render_duration_seconds', {'template': template.name or 'string'},
+                                  time.perf_counter() - g.metrics_renders.pop())
+
+    def _path(self, pid):
+        return os.path.join(self.app.config['METRICS_DIR'], f'{pid}.json')
+
+    def flush(self):
+        """Write this worker's metrics for the others to read."""
+        self._flushed_at = time.monotonic()
+        data = self.registry.snapshot()
+        data['collected'] = {}
+        for function in self._collectors:
+            data['collected'].update(function())
+        path = self._path(os.getpid())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _worker_files(self):
+        directory = self.app.config['METRICS_DIR']
+        for name in os.listdir(directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    yield int(name[:-5]), json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def render(self):
+        """All workers' metrics, summed, in the Prometheus text exposition format."""
+        self.flush()
+        counters, histograms, gauges = {}, {}, {}
+        for pid, data in self._worker_files():
+            for name, labels, value in data['counters']:
+                key = (name, tuple(tuple(item) for item in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, total, count in data['histograms']:
+                key = (name, tuple(tuple(item) for item in labels))
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+            alive = _pid_alive(pid)
+            for name, value in data.get('collected', {}).items():
+                if DEFINITIONS[name][0] == 'counter':
+                    key = (name, ())
+                    counters[key] = counters.get(key, 0) + value
+                elif alive:
+                    gauges[(name, (('pid', str(pid)),))] = value
+
+        lines = []
+        for name, (kind, help_text, buckets) in DEFINITIONS.items():
+            samples = []
+            if kind == 'histogram':
+                for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket in zip(buckets, counts):
+                        cumulative += bucket
+                        samples.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+                    samples.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                    samples.append(f"{PREFIX}{name}_sum{_labels(labels)} {total}")
+                    samples.append(f"{PREFIX}{name}_count{_labels(labels)} {count}")
+            else:
+                source = counters if kind == 'counter' else gauges
+                for (metric, labels), value in sorted(source.items()):
+                    if metric == name:
+                        samples.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+            if samples:
+                lines.append(f"# HELP {PREFIX}{name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+metrics = Metrics()
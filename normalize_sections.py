@@ -1,50 +1,101 @@
-import os
-from app import app, db, Page, Section
-
-with app.app_context():
-    print("Starting section normalization...")
-    pages = Page.query.all()
-    total_updated = 0
-    
-    for page in pages:
-        print(f"\nProcessing page: {page.title}")
-        sections_by_type_lang = {}
-        
-        for section in Section.query.filter_by(page_id=page.id).order_by(Section.order_index).all():
-            key = (section.section_type, section.language_code)
-            if key not in sections_by_type_lang:
-                sections_by_type_lang[key] = []
-            sections_by_type_lang[key].append(section)
-        
-        new_order = 0
-        section_types_seen = set()
-        
-        for section_type in set(st for st, _ in sections_by_type_lang.keys()):
-            if section_type in section_types_seen:
-                continue
-            section_types_seen.add(section_type)
-            
-            fr_sections = sections_by_type_lang.get((section_type, 'fr'), [])
-            en_sections = sections_by_type_lang.get((section_type, 'en'), [])
-            
-            max_pairs = max(len(fr_sections), len(en_sections))
-            for i in range(max_pairs):
-                if i < len(fr_sections):
-                    old_order = fr_sections[i].order_index
-                    fr_sections[i].order_index = new_order
-                    if old_order != new_order:
-                        print(f"  FR {section_type} #{i}: {old_order} -> {new_order}")
-                        total_updated += 1
-                        
-                if i < len(en_sections):
-                    old_order = en_sections[i].order_index
-                    en_sections[i].order_index = new_order
-                    if old_order != new_order:
-                        print(f"  EN {section_type} #{i}: {old_order} -> {new_order}")
-                        total_updated += 1
-                        
-                new_order += 1
-    
-    db.session.commit()
-    print(f"\n✓ Migration complete! Updated {total_updated} sections.")
-    print("All FR/EN section pairs now share the same order_index.")
+"""
+Renumbers section order_index so that every language version of a section
+shares one position, and each page's positions run 0, 1, 2, ... without gaps.
+
+Sections are grouped by translation_group_id; groups keep their current
+relative order (lowest order_index, then id). All sections are read in one
+query, the rows that move are updated with one CASE statement per batch and
+the content versions of the affected pages are bumped in one more statement.
+
+Used by the /admin/normalize-sections route and from the command line:
+
+    python3 normalize_sections.py [--dry-run]
+"""
+
+import argparse
+import time
+from collections import namedtuple
+
+from sqlalchemy import case, update
+
+# Keeps the CASE statement, two bound parameters per row, well under driver limits
+UPDATE_BATCH_SIZE = 500
+
+Change = namedtuple('Change', ['section_id', 'page_slug', 'section_type', 'language_code',
+                               'old_order', 'new_order'])
+Result = namedtuple('Result', ['changes', 'pages', 'sections', 'seconds', 'dry_run'])
+
+
+def plan():
+    """The Change of every section whose order_index differs from its normalized one."""
+    from app import db, Page, Section
+
+    rows = (db.session.query(Section.id, Page.slug, Section.section_type, Section.language_code,
+                             Section.order_index, Section.translation_group_id)
+            .join(Page, Page.id == Section.page_id)
+            .order_by(Section.page_id, Section.order_index, Section.id))
+
+    changes, positions, sections = [], {}, 0
+    for section_id, slug, section_type, language_code, order_index, group_id in rows:
+        sections += 1
+        page_positions = positions.setdefault(slug, {})
+        key = group_id or f'section-{section_id}'
+        new_order = page_positions.setdefault(key, len(page_positions))
+        if order_index != new_order:
+            changes.append(Change(section_id, slug, section_type, language_code, order_index, new_order))
+    return changes, sections
+
+
+def apply(changes):
+    """Write the new order_index of each change and bump the affected pages at once. The caller commits."""
+    from app import db, Section, bump_content_version, page_scope
+
+    for start in range(0, len(changes), UPDATE_BATCH_SIZE):
+        batch = changes[start:start + UPDATE_BATCH_SIZE]
+        db.session.execute(
+            update(Section)
+            .where(Section.id.in_([change.section_id for change in batch]))
+            .values(order_index=case({change.section_id: change.new_order for change in batch},
+                                     value=Section.id)),
+            execution_options={'synchronize_session': False}
+        )
+    bump_content_version(*{page_scope(change.page_slug) for change in changes})
+
+
+def normalize(dry_run=False):
+    """
+    Normalize every page. Sections without a translation group get one first,
+    as in migration 5. With dry_run nothing is written. Returns a Result.
+    """
+    from app import db, assign_translation_groups
+
+    started = time.perf_counter()
+    assign_translation_groups()
+    db.session.flush()
+    changes, sections = plan()
+    if dry_run:
+        db.session.rollback()
+    else:
+        if changes:
+            apply(changes)
+        db.session.commit()
+    return Result(changes, len({change.page_slug for change in changes}), sections,
+                  time.perf_counter() - started, dry_run)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Give every language version of a section the same order_index.')
+    parser.add_argument('--dry-run', action='store_true', help='Print the changes without writing them')
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        print("Starting section normalization...")
+        result = normalize(dry_run=args.dry_run)
+        for change in result.changes:
+            print(f"  {change.page_slug} {change.language_code.upper()} {change.section_type} "
+                  f"#{change.section_id}: {change.old_order} -> {change.new_order}")
+        verb = 'Would update' if result.dry_run else 'Updated'
+        print(f"\n✓ {verb} {len(result.changes)} of {result.sections} sections on {result.pages} pages "
+              f"in {result.seconds * 1000:.1f} ms.")
@@ -0,0 +1,249 @@
+"""
+Per-view SQL query budgets and N+1 detection.
+
+A view declares how many statements one request may run:
+
+    @app.route('/about')
+    @query_budget(1)
+    def about(): ...
+
+Statements run while a worker-level cache refills (content versions, the
+settings snapshot, the derivative index, site icons, rendered pages) are
+wrapped in amortized(): they are reported but not charged to the budget, which
+describes the steady state. Independently of budgets, a statement run
+QUERY_REPEAT_THRESHOLD times or more in one request is reported with the line
+that issued it, the usual shape of an N+1 loop.
+
+QUERY_BUDGET_MODE is 'raise' (QueryBudgetExceeded out of the request), 'log'
+(a warning), 'off', or 'auto': raise under app.testing or app.debug, log
+otherwise. The per-request QueryLog is kept in every mode: metrics.py reads its
+statement count and SQL time, so there is one Engine listener for both.
+
+check_routes() requests every GET route of app.url_map and collects the
+violations; it is what tests/test_query_budgets.py asserts on, and what
+
+    python3 query_budgets.py [--admin]
+
+runs against the configured database.
+"""
+
+import argparse
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# GET routes that write, or log the client out
+UNSAFE_ENDPOINTS = {'admin_logout', 'init_db', 'normalize_sections', 'set_language', 'static'}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Allow the decorated view at most limit statements per request, amortized ones aside."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+@contextmanager
+def amortized():
+    """Statements run inside refill a cache shared by later requests; they do not count against the budget."""
+    if not has_request_context() or 'query_log' not in g:
+        yield
+        return
+    g.query_log.amortized_depth += 1
+    try:
+        yield
+    finally:
+        g.query_log.amortized_depth -= 1
+
+
+class QueryLog:
+    """Statements of one request: statement -> [count, distinct parameter sets, call site]."""
+
+    def __init__(self):
+        self.counted = 0
+        self.amortized = 0
+        self.seconds = 0.0
+        self.amortized_depth = 0
+        self.statements = {}
+
+    @property
+    def total(self):
+        return self.counted + self.amortized
+
+    def record(self, statement, parameters, seconds):
+        self.seconds += seconds
+        if self.amortized_depth:
+            self.amortized += 1
+        else:
+            self.counted += 1
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, {repr(parameters)}, None]
+            return
+        entry[0] += 1
+        entry[1].add(repr(parameters))
+        if entry[2] is None:
+            # Only repeated statements pay for the stack walk
+            entry[2] = _call_site()
+
+
+def _call_site():
+    """file:line in function of the innermost frame in this project, outside installed packages."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(ROOT) and filename != __file__
+                and 'site-packages' not in filename and 'dist-packages' not in filename):
+            return f'{os.path.relpath(filename, ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown call site'
+
+
+class QueryBudgets:
+    def __init__(self):
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_request(self):
+        g.query_log = QueryLog()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # The execution context lives for one statement, so a failed one leaves nothing behind
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Boot, CLI scripts and the image worker threads have no request to charge
+        if has_request_context() and 'query_log' in g:
+            started = getattr(context, '_query_started', None)
+            g.query_log.record(statement, parameters, 0.0 if started is None else time.perf_counter() - started)
+
+    def violations(self, log):
+        """Human-readable problems of a finished request's QueryLog, empty if within budget."""
+        problems = []
+        view = self.app.view_functions.get(request.endpoint)
+        limit = getattr(view, 'query_budget', None)
+        if limit is not None and log.counted > limit:
+            problems.append(f'{log.counted} queries for a budget of {limit} ({log.amortized} amortized)')
+        threshold = self.app.config['QUERY_REPEAT_THRESHOLD']
+        for statement, (count, parameter_sets, call_site) in log.statements.items():
+            if count >= threshold:
+                problems.append(f"{count}x ({len(parameter_sets)} distinct parameters) at {call_site}: "
+                                f"{' '.join(statement.split())[:200]}")
+        return problems
+
+    def _after_request(self, response):
+        # Left in g for the metrics hook, which runs after this one
+        log = g.get('query_log')
+        if log is None or self.app.config['QUERY_BUDGET_MODE'] == 'off':
+            return response
+        problems = self.violations(log)
+        if not problems:
+            return response
+        message = f"{request.method} {request.path} ({request.endpoint}): " + '; '.join(problems)
+        mode = self.app.config['QUERY_BUDGET_MODE']
+        if mode == 'raise' or (mode == 'auto' and (self.app.testing or self.app.debug)):
+            raise QueryBudgetExceeded(message)
+        self.app.logger.warning('Query budget: %s', message)
+        return response
+
+
+def route_urls(app, values=None):
+    """
+    (endpoint, url) of every GET route that is safe to request. A <lang>
+    argument takes DEFAULT_LANGUAGE; other arguments come from values,
+    endpoint -> url_for() keyword arguments, and routes left without them
+    are skipped.
+    """
+    values = values or {}
+    urls = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if 'GET' not in rule.methods or rule.endpoint in UNSAFE_ENDPOINTS:
+            continue
+        arguments = dict(rule.defaults or {})
+        if 'lang' in rule.arguments and 'lang' not in arguments:
+            arguments['lang'] = app.config['DEFAULT_LANGUAGE']
+        arguments.update(values.get(rule.endpoint, {}))
+        if not rule.arguments <= set(arguments):
+            continue
+        url = rule.build(arguments, append_unknown=False)[1]
+        if (rule.endpoint, url) not in urls:
+            urls.append((rule.endpoint, url))
+    return urls
+
+
+def check_routes(client, values=None, before_each=None):
+    """
+    Request each of route_urls() with client twice and return [(url, message)]
+    for the ones over budget. The second request sees warm caches unless
+    before_each(), run before every request, empties them.
+    """
+    app = client.application
+    saved = app.config['QUERY_BUDGET_MODE'], app.config['PROPAGATE_EXCEPTIONS']
+    app.config['QUERY_BUDGET_MODE'], app.config['PROPAGATE_EXCEPTIONS'] = 'raise', True
+    failures = []
+    try:
+        for endpoint, url in route_urls(app, values):
+            for _ in range(2):
+                if before_each is not None:
+                    before_each()
+                try:
+                    client.get(url)
+                except QueryBudgetExceeded as exc:
+                    failures.append((url, str(exc)))
+                    break
+    finally:
+        app.config['QUERY_BUDGET_MODE'], app.config['PROPAGATE_EXCEPTIONS'] = saved
+    return failures
+
+
+query_budgets = QueryBudgets()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Request every GET route and report query budget violations.')
+    parser.add_argument('--admin', action='store_true',
+                        help='Log in first (ADMIN_USERNAME / ADMIN_PASSWORD) to check the admin views too')
+    args = parser.parse_args()
+
+    from app import app, Page
+
+    if app.config['QUERY_BUDGET_MODE'] == 'off':
+        sys.exit('QUERY_BUDGET_MODE is off, nothing is checked.')
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    if args.admin:
+        response = client.post('/admin/login', data={'username': os.getenv('ADMIN_USERNAME', 'admin'),
+                                                     'password': os.getenv('ADMIN_PASSWORD', '')})
+        if response.status_code != 302:
+            sys.exit('Login failed, check ADMIN_USERNAME and ADMIN_PASSWORD.')
+
+    with app.app_context():
+        page = Page.query.order_by(Page.id).first()
+        values = {'sitemap_part': {'part': 1}, 'site_icon': {'name': f"icon-{app.config['PWA_ICON_SIZES'][0]}.png"}}
+        if page is not None:
+            values['admin_edit_page'] = {'page_id': page.id}
+
+    urls = route_urls(app, values)
+    failures = check_routes(client, values)
+    for url, message in failures:
+        print(f"✗ {message}")
+    print(f"\n{'✓' if not failures else '✗'} {len(urls) - len(failures)} of {len(urls)} routes within budget.")
+    sys.exit(1 if failures else 0)
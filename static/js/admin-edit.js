@@ -82,3 +82,29 @@ function quickUploadImage() {
         fileInput.value = '';
     });
 }
+
+function renderPickerImage(image) {
+    const card = document.createElement('div');
+    card.className = 'group relative bg-gray-100 rounded overflow-hidden cursor-pointer hover:ring-4 hover:ring-accent transition-all';
+    card.addEventListener('click', () => selectImage(image.url));
+    card.appendChild(imageThumbnail(image, 'w-full h-32 object-cover'));
+
+    const overlay = document.createElement('div');
+    overlay.className = 'absolute inset-0 bg-black bg-opacity-0 group-hover:bg-opacity-40 transition-all flex items-center justify-center';
+    const size = document.createElement('p');
+    size.className = 'text-white text-xs opacity-0 group-hover:opacity-100 transition-all px-2 text-center';
+    size.textContent = image.width + 'x' + image.height + 'px';
+    overlay.appendChild(size);
+
+    const badge = document.createElement('div');
+    badge.className = 'absolute top-2 right-2 opacity-0 group-hover:opacity-100 transition-all';
+    badge.innerHTML = '<span class="bg-accent text-white px-2 py-1 rounded text-xs font-bold">✓</span>';
+
+    card.append(overlay, badge);
+    return card;
+}
+
+const imagePickerModal = document.getElementById('imagePickerModal');
+if (imagePickerModal) {
+    initImageLibrary(imagePickerModal, renderPickerImage);
+}
@@ -0,0 +1,94 @@
+// Searchable image grid fed page by page from /admin/api/images. The next page
+// is requested when the sentinel below the grid scrolls into view, so a
+// picker that is never opened never loads anything.
+//
+// root contains [data-library-grid], [data-library-sentinel] and optionally
+// [data-library-search] and [data-library-empty]; renderItem(image) returns
+// the element for one image.
+function initImageLibrary(root, renderItem) {
+    const grid = root.querySelector('[data-library-grid]');
+    const sentinel = root.querySelector('[data-library-sentinel]');
+    const search = root.querySelector('[data-library-search]');
+    const empty = root.querySelector('[data-library-empty]');
+
+    let cursor = null;
+    let query = '';
+    let loading = false;
+    let done = false;
+    // Responses for an earlier search are dropped
+    let generation = 0;
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadMore();
+        }
+    });
+
+    function loadMore() {
+        if (loading || done) return;
+        loading = true;
+        const current = generation;
+        const params = new URLSearchParams();
+        if (cursor) params.set('cursor', cursor);
+        if (query) params.set('q', query);
+
+        fetch('/admin/api/images?' + params.toString(), { headers: { 'Accept': 'application/json' } })
+            .then(response => response.json())
+            .then(data => {
+                if (current !== generation) return;
+                data.images.forEach(image => grid.appendChild(renderItem(image)));
+                cursor = data.next_cursor;
+                done = !cursor;
+                if (empty) {
+                    empty.classList.toggle('hidden', grid.children.length > 0);
+                }
+            })
+            .finally(() => {
+                if (current !== generation) return;
+                loading = false;
+                if (!done) {
+                    // Fires again at once if the sentinel is still visible
+                    observer.unobserve(sentinel);
+                    observer.observe(sentinel);
+                }
+            });
+    }
+
+    function reset() {
+        generation += 1;
+        cursor = null;
+        loading = false;
+        done = false;
+        grid.replaceChildren();
+        observer.unobserve(sentinel);
+        observer.observe(sentinel);
+    }
+
+    if (search) {
+        let timer = null;
+        // The search box may sit inside a form, e.g. the settings page
+        search.addEventListener('keydown', event => {
+            if (event.key === 'Enter') event.preventDefault();
+        });
+        search.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                query = search.value.trim();
+                reset();
+            }, 250);
+        });
+    }
+
+    observer.observe(sentinel);
+    return { reload: reset };
+}
+
+function imageThumbnail(image, className) {
+    const img = document.createElement('img');
+    img.src = image.thumbnail_url;
+    img.alt = image.alt_text;
+    img.loading = 'lazy';
+    img.decoding = 'async';
+    img.className = className;
+    return img;
+}
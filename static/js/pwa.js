@@ -1,7 +1,13 @@
 // PWA Registration and Install Logic
 if ('serviceWorker' in navigator) {
     window.addEventListener('load', () => {
-        navigator.serviceWorker.register('/static/sw.js')
+        // The worker used to live under /static/, where it could not control the pages
+        navigator.serviceWorker.getRegistrations().then(registrations => {
+            registrations
+                .filter(registration => registration.scope.endsWith('/static/'))
+                .forEach(registration => registration.unregister());
+        });
+        navigator.serviceWorker.register('/sw.js')
             .then(registration => {
                 console.log('PWA: SW registered: ', registration);
             })
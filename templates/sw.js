@@ -0,0 +1,71 @@
+// Generated by the service_worker view in app.py; the cache name changes with
+// every content edit and every deploy, which drops the previous caches.
+const CACHE_NAME = {{ cache_name|tojson }};
+const CACHE_PREFIX = {{ cache_prefix|tojson }};
+const PRECACHE_URLS = {{ precache_urls|tojson }};
+const OFFLINE_URL = {{ offline_url|tojson }};
+// Fingerprinted or content-addressed, so a cached copy is never stale
+const IMMUTABLE_PREFIXES = {{ immutable_prefixes|tojson }};
+const BYPASS_PREFIXES = ['/admin', '/set_language'];
+
+self.addEventListener('install', event => {
+    self.skipWaiting();
+    event.waitUntil(
+        caches.open(CACHE_NAME).then(cache => cache.addAll(PRECACHE_URLS))
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(cacheNames => Promise.all(
+                cacheNames
+                    .filter(cacheName => cacheName.startsWith(CACHE_PREFIX) && cacheName !== CACHE_NAME)
+                    .map(cacheName => caches.delete(cacheName))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+function cacheFirst(request) {
+    return caches.match(request).then(cached => cached || fetch(request).then(response => {
+        if (response.ok) {
+            const copy = response.clone();
+            caches.open(CACHE_NAME).then(cache => cache.put(request, copy));
+        }
+        return response;
+    }));
+}
+
+function staleWhileRevalidate(event) {
+    const request = event.request;
+    const network = fetch(request).then(response => {
+        if (response.ok && !response.redirected) {
+            const copy = response.clone();
+            caches.open(CACHE_NAME).then(cache => cache.put(request, copy));
+        }
+        return response;
+    });
+    return caches.match(request).then(cached => {
+        if (cached) {
+            event.waitUntil(network.catch(() => undefined));
+            return cached;
+        }
+        return network.catch(() => request.mode === 'navigate' ? caches.match(OFFLINE_URL) : Response.error());
+    });
+}
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+    if (BYPASS_PREFIXES.some(prefix => url.pathname.startsWith(prefix))) {
+        return;
+    }
+    if (IMMUTABLE_PREFIXES.some(prefix => url.pathname.startsWith(prefix))) {
+        event.respondWith(cacheFirst(event.request));
+        return;
+    }
+    event.respondWith(staleWhileRevalidate(event));
+});
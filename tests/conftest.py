@@ -0,0 +1,75 @@
+"""
+Shared fixtures. app.py reads its configuration from the environment when it
+is imported, so this module points it at a throwaway SQLite database first;
+the import then migrates and seeds that database like a fresh install.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DIR = tempfile.mkdtemp(prefix='bellari-tests-')
+ADMIN_USERNAME = 'admin'
+ADMIN_PASSWORD = 'test-password'
+
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}",
+    'METRICS_DIR': os.path.join(TEST_DIR, 'metrics'),
+    'SESSION_SECRET': 'test-secret',
+    'FORCE_HTTPS': 'false',
+    'ADMIN_USERNAME': ADMIN_USERNAME,
+    'ADMIN_PASSWORD': ADMIN_PASSWORD,
+})
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app import (app as flask_app, db, Page, content_versions, derivative_index, page_cache,  # noqa: E402
+                 settings_snapshot, site_icons)
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    yield flask_app
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    response = client.post('/admin/login', data={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def reset_caches():
+    """Callable emptying every worker-level cache, as in a freshly started worker."""
+    def reset():
+        page_cache.invalidate()
+        content_versions.expire()
+        for value in (settings_snapshot, derivative_index, site_icons):
+            value.expire()
+    reset()
+    return reset
+
+
+@pytest.fixture
+def route_values(app):
+    """url_for() arguments for the routes check_routes() cannot fill in by itself."""
+    with app.app_context():
+        page_id = db.session.query(Page.id).filter_by(slug='home').scalar()
+    return {
+        'admin_edit_page': {'page_id': page_id},
+        'sitemap_part': {'part': 1},
+        'site_icon': {'name': f"icon-{app.config['PWA_ICON_SIZES'][0]}.png"},
+    }
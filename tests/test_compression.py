@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/fr/about', '/sitemap.xml', '/robots.txt', '/sw.js'])
+def test_not_modified_varies_like_the_full_response(client, path):
+    response = client.get(path, headers={'Accept-Encoding': 'br, gzip'})
+    assert response.status_code == 200
+    assert 'Accept-Encoding' in response.vary
+
+    revalidated = client.get(path, headers={'Accept-Encoding': 'br, gzip', 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert 'Accept-Encoding' in revalidated.vary
+
+
+def test_icons_do_not_vary_on_encoding(client):
+    response = client.get('/favicon.ico')
+    if response.status_code == 404:
+        pytest.skip('no favicon configured')
+    revalidated = client.get('/favicon.ico', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert 'Accept-Encoding' not in revalidated.vary
@@ -0,0 +1,32 @@
+from html.parser import HTMLParser
+
+import pytest
+
+from app import PUBLIC_PAGES, localized_path
+
+
+class _FormParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.attributes = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'form':
+            self.attributes.append(dict(attrs))
+
+
+@pytest.mark.parametrize('url_path', [url_path for url_path, _ in PUBLIC_PAGES.values()])
+def test_public_pages_set_no_cookie(client, url_path):
+    response = client.get(localized_path(url_path, 'fr'))
+    assert response.status_code == 200
+    assert 'Set-Cookie' not in response.headers
+    assert 'Cookie' not in response.vary
+
+
+def test_contact_form_does_not_post_to_a_missing_handler(client):
+    forms = _FormParser()
+    forms.feed(client.get('/fr/contact').get_data(as_text=True))
+    assert forms.attributes
+    for attributes in forms.attributes:
+        assert attributes.get('method', 'get').lower() == 'get'
+    assert client.post('/fr/contact').status_code == 405
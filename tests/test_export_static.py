@@ -0,0 +1,32 @@
+import os
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse
+
+from app import PUBLIC_PAGES
+from export_static import _page_path, export_site
+
+BASE_URL = 'https://export.example'
+
+
+def test_pages_are_exported_under_their_language_prefix(app, tmp_path):
+    export_site(output_dir=str(tmp_path), base_url=BASE_URL, force=True)
+
+    about = (tmp_path / 'fr' / 'about' / 'index.html').read_text()
+    assert f'<link rel="canonical" href="{BASE_URL}/fr/about">' in about
+
+    stub = (tmp_path / 'about' / 'index.html').read_text()
+    assert '<meta http-equiv="refresh" content="0; url=/fr/about">' in stub
+    assert '<meta name="robots" content="noindex">' in stub
+    for url_path, _ in PUBLIC_PAGES.values():
+        assert 'http-equiv="refresh"' in (tmp_path / _page_path(url_path)).read_text()
+
+
+def test_every_sitemap_url_is_an_exported_page(app, tmp_path):
+    export_site(output_dir=str(tmp_path), base_url=BASE_URL, force=True)
+    root = ET.parse(tmp_path / 'sitemap.xml').getroot()
+    locs = [loc.text for loc in root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
+    assert locs
+    for loc in locs:
+        path = urlparse(loc).path.strip('/')
+        assert os.path.exists(tmp_path / path / 'index.html'), loc
+        assert 'http-equiv="refresh"' not in (tmp_path / path / 'index.html').read_text()
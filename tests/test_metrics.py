@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture
+def metrics_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'abc')
+    return 'abc'
+
+
+def test_bearer_token_grants_access(client, metrics_token):
+    response = client.get('/admin/metrics', headers={'Authorization': f'Bearer {metrics_token}'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+@pytest.mark.parametrize('authorization', ['Bearer wrong', 'Bearer é', 'abc'])
+def test_bad_bearer_token_is_unauthorized(client, metrics_token, authorization):
+    response = client.get('/admin/metrics', headers={'Authorization': authorization})
+    assert response.status_code in (302, 401)
@@ -0,0 +1,45 @@
+from sqlalchemy import event
+
+from app import db, Section, bump_content_version, page_scope
+from normalize_sections import UPDATE_BATCH_SIZE, apply, normalize, plan
+
+
+def _shift_sections(app):
+    with app.app_context():
+        db.session.query(Section).update({Section.order_index: Section.order_index + 10})
+        db.session.commit()
+
+
+def test_apply_runs_a_fixed_number_of_statements(app):
+    _shift_sections(app)
+    with app.app_context():
+        changes, _ = plan()
+        pages = {change.page_slug for change in changes}
+        assert len(pages) > 1
+        # Scopes bumped before, as on any site that has been edited once
+        bump_content_version(*map(page_scope, pages))
+        db.session.commit()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'after_cursor_execute', listener)
+        try:
+            apply(changes)
+            db.session.flush()
+        finally:
+            event.remove(db.engine, 'after_cursor_execute', listener)
+        db.session.commit()
+
+        batches = -(-len(changes) // UPDATE_BATCH_SIZE)
+        # The CASE updates, then one content version bump for every page
+        assert len(statements) == batches + 1
+        assert plan()[0] == []
+
+
+def test_route_normalizes_within_query_budget(app, admin_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUERY_BUDGET_MODE', 'raise')
+    monkeypatch.setitem(app.config, 'PROPAGATE_EXCEPTIONS', True)
+    _shift_sections(app)
+    assert admin_client.get('/admin/normalize-sections').status_code == 302
+    with app.app_context():
+        assert normalize(dry_run=True).changes == []
@@ -0,0 +1,34 @@
+from app import page_cache
+
+
+def test_forged_hosts_share_the_site_url_entry(app, client, reset_caches):
+    site_url = app.config['SITE_URL']
+    misses = page_cache.stats()['misses']
+    for i in range(5):
+        response = client.get('/fr/about', headers={'X-Forwarded-Host': f'attacker-{i}.example'})
+        body = response.get_data(as_text=True)
+        assert response.status_code == 200
+        assert f'<link rel="canonical" href="{site_url}/fr/about">' in body
+        assert 'attacker' not in body
+    assert page_cache.stats()['entries'] == 1
+    assert page_cache.stats()['misses'] == misses + 1
+
+
+def test_allowed_host_gets_its_own_urls(app, client, reset_caches):
+    host = app.config['ALLOWED_HOSTS'][0]
+    body = client.get('/fr/about', base_url=f'http://{host}').get_data(as_text=True)
+    assert f'<link rel="canonical" href="http://{host}/fr/about">' in body
+    client.get('/fr/about')
+    assert page_cache.stats()['entries'] == 2
+
+
+def test_least_recently_used_pages_are_dropped(app, client, reset_caches, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGE_CACHE_MAX_ENTRIES', 2)
+    for path in ('/fr/', '/fr/about', '/fr/', '/fr/contact'):
+        assert client.get(path).status_code == 200
+    assert page_cache.stats()['entries'] == 2
+    misses = page_cache.stats()['misses']
+    client.get('/fr/')
+    assert page_cache.stats()['misses'] == misses
+    client.get('/fr/about')
+    assert page_cache.stats()['misses'] == misses + 1
@@ -0,0 +1,70 @@
+import pytest
+from flask import g
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app import db, PUBLIC_PAGES, load_page
+from query_budgets import QueryBudgetExceeded, check_routes, query_budgets
+
+
+@pytest.mark.parametrize('slug', PUBLIC_PAGES)
+def test_load_page_runs_one_statement(app, slug):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    with app.app_context():
+        event.listen(db.engine, 'after_cursor_execute', listener)
+        try:
+            for lang in app.config['LANGUAGES']:
+                assert load_page(slug, lang).page is not None
+        finally:
+            event.remove(db.engine, 'after_cursor_execute', listener)
+    assert len(statements) == len(app.config['LANGUAGES'])
+
+
+@pytest.mark.parametrize('client_fixture', ['client', 'admin_client'])
+def test_routes_within_budget_with_warm_caches(request, client_fixture, route_values):
+    client = request.getfixturevalue(client_fixture)
+    assert check_routes(client, route_values) == []
+
+
+@pytest.mark.parametrize('client_fixture', ['client', 'admin_client'])
+def test_routes_within_budget_with_cold_caches(request, client_fixture, route_values, reset_caches):
+    client = request.getfixturevalue(client_fixture)
+    assert check_routes(client, route_values, before_each=reset_caches) == []
+
+
+def test_view_over_budget_is_reported(app, admin_client, route_values, monkeypatch):
+    monkeypatch.setattr(app.view_functions['admin_edit_page'], 'query_budget', 0)
+    failures = check_routes(admin_client, route_values)
+    assert [url for url, _ in failures] == [f"/admin/page/{route_values['admin_edit_page']['page_id']}"]
+    assert 'for a budget of 0' in failures[0][1]
+
+
+def test_repeated_statement_is_reported_with_its_call_site(app):
+    with app.test_request_context('/admin/login'):
+        query_budgets._before_request()
+        for page_id in range(app.config['QUERY_REPEAT_THRESHOLD']):
+            db.session.execute(text('SELECT id FROM page WHERE id = :id'), {'id': page_id})
+        problems = query_budgets.violations(g.query_log)
+    assert len(problems) == 1
+    assert problems[0].startswith(f"{app.config['QUERY_REPEAT_THRESHOLD']}x (")
+    assert 'tests/test_query_budgets.py' in problems[0]
+
+
+def test_failed_statement_leaves_the_log_consistent(app):
+    with app.test_request_context('/admin/login'):
+        query_budgets._before_request()
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT id FROM missing_table'))
+        db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        assert g.query_log.total == 1
+        assert g.query_log.seconds > 0
+
+
+def test_raises_under_testing(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUERY_BUDGET_MODE', 'auto')
+    monkeypatch.setitem(app.config, 'PROPAGATE_EXCEPTIONS', True)
+    monkeypatch.setattr(app.view_functions['index'], 'query_budget', -1)
+    with pytest.raises(QueryBudgetExceeded):
+        app.test_client().get('/fr/')
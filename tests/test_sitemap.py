@@ -0,0 +1,46 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def _locs(response, tag):
+    assert response.status_code == 200
+    assert response.mimetype == 'application/xml'
+    root = ET.fromstring(response.get_data())
+    assert root.tag == f'{SITEMAP}{tag}'
+    return [loc.text for loc in root.iter(f'{SITEMAP}loc')]
+
+
+@pytest.fixture(params=[True, False], ids=['cached', 'streamed'])
+def page_cache_enabled(request, app, monkeypatch, reset_caches):
+    monkeypatch.setitem(app.config, 'PAGE_CACHE_ENABLED', request.param)
+    return request.param
+
+
+def test_small_site_is_a_single_urlset(app, client, page_cache_enabled):
+    locs = _locs(client.get('/sitemap.xml'), 'urlset')
+    assert f"{app.config['SITE_URL']}/fr/" in locs
+    assert client.get('/sitemap-1.xml').status_code == 404
+
+
+def test_split_into_an_index_and_parts(app, client, page_cache_enabled, monkeypatch, reset_caches):
+    all_locs = _locs(client.get('/sitemap.xml'), 'urlset')
+    monkeypatch.setitem(app.config, 'SITEMAP_MAX_URLS', 2)
+    # The cached copy was built with the default size
+    reset_caches()
+    parts = -(-len(all_locs) // 2)
+
+    index = _locs(client.get('/sitemap.xml'), 'sitemapindex')
+    assert index == [f"{app.config['SITE_URL']}/sitemap-{part}.xml" for part in range(1, parts + 1)]
+
+    part_locs = []
+    for part in range(1, parts + 1):
+        locs = _locs(client.get(f'/sitemap-{part}.xml'), 'urlset')
+        assert 1 <= len(locs) <= 2
+        part_locs += locs
+    assert part_locs == all_locs
+
+    assert client.get(f'/sitemap-{parts + 1}.xml').status_code == 404
+    assert client.get('/sitemap-0.xml').status_code == 404
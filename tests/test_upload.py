@@ -0,0 +1,35 @@
+import hashlib
+import io
+
+from PIL import Image as PILImage
+
+from app import db, Image
+
+
+def _png():
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def test_reupload_under_another_extension_leaves_no_file(app, admin_client, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    data = _png()
+    content_hash = hashlib.sha256(data).hexdigest()
+    (tmp_path / f'{content_hash}.png').write_bytes(data)
+    with app.app_context():
+        image = Image(filename=f'{content_hash}.png', original_filename='red.png', content_hash=content_hash)
+        db.session.add(image)
+        db.session.commit()
+        image_id = image.id
+
+    try:
+        response = admin_client.post('/admin/upload', data={'file': (io.BytesIO(data), 'red.jpg')})
+        assert response.status_code == 200
+        assert response.json['duplicate'] is True
+        assert response.json['image']['id'] == image_id
+        assert sorted(path.name for path in tmp_path.iterdir()) == [f'{content_hash}.png']
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(Image, image_id))
+            db.session.commit()